@@ -0,0 +1,190 @@
+import argparse
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import extract_site
+import site_json
+import site_model
+import site_records
+from extract_manifest import Manifest, extractor_version
+from extract_site import render_page
+from instrument import stage
+from site_model import load_site_model
+from snapshot_store import is_archive_ref
+
+REPORT_FILE = "extract_report.json"
+
+# Everything the rendered text depends on; editing any of these rebuilds all.
+EXTRACTOR_SOURCES = [__file__, extract_site.__file__, site_json.__file__, site_model.__file__,
+                     *site_records.SOURCES]
+
+
+def expand_inputs(patterns):
+    """Snapshot paths for a mix of files, directories, globs and
+    archive: references, sorted."""
+    paths = set()
+    for pattern in patterns:
+        if is_archive_ref(pattern):
+            paths.add(pattern)
+        elif os.path.isdir(pattern):
+            paths.update(glob.glob(os.path.join(pattern, "temp_*.html")))
+        else:
+            paths.update(glob.glob(pattern))
+    return sorted(paths)
+
+
+def extract_snapshot(file_path):
+    """Worker: decode one snapshot and render each page that has sections.
+
+    Never raises; failures come back in the result so one bad snapshot
+    does not take the batch down. A snapshot without window._site (a plain
+    HTML page) is skipped, not failed.
+    """
+    started = time.perf_counter()
+    result = {"snapshot": file_path, "pages": [], "error": None, "skipped": None}
+    try:
+        model = load_site_model(file_path)
+        if model is None:
+            result["skipped"] = "no window._site"
+        else:
+            for page in model.pages_with_sections():
+                file_name, text = render_page(page)
+                result["pages"].append({"uriPath": page.get('uriPath'), "output": file_name, "text": text})
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def pick_winners(file_paths, pages_by_snapshot):
+    """output file -> (uriPath, snapshot).
+
+    The first snapshot (by path) that holds a page wins, so the merged set
+    does not depend on which worker finished first.
+    """
+    winners = {}
+    for file_path in file_paths:
+        for page in pages_by_snapshot.get(file_path, []):
+            winners.setdefault(page["output"], (page["uriPath"], file_path))
+    return dict(sorted(winners.items()))
+
+
+def run_pool(file_paths, workers):
+    if not file_paths:
+        return {}
+    if workers == 1:
+        # In this process, where instrument can see the stages.
+        return {file_path: extract_snapshot(file_path) for file_path in file_paths}
+    with ProcessPoolExecutor(max_workers=min(workers, len(file_paths))) as executor:
+        return dict(zip(file_paths, executor.map(extract_snapshot, file_paths)))
+
+
+def batch_extract(file_paths, out_dir=".", workers=None, report_path=None, force=False):
+    """Extract `file_paths` in parallel, rebuilding only what changed.
+
+    Snapshots whose content and extractor are unchanged since the last run
+    are not decoded at all; their page lists come from the manifest.
+    """
+    workers = workers or os.cpu_count() or 1
+    manifest = Manifest()
+    version = extractor_version(*EXTRACTOR_SOURCES)
+
+    summaries = {}
+    for file_path in file_paths:
+        cached = None if force else manifest.snapshot_result(file_path, version)
+        if cached is not None:
+            summaries[file_path] = dict(cached, snapshot=file_path, cached=True)
+
+    results = run_pool([p for p in file_paths if p not in summaries], workers)
+    for file_path, result in results.items():
+        summary = {
+            "pages": [{"uriPath": page["uriPath"], "output": page["output"]} for page in result["pages"]],
+            "error": result["error"],
+            "skipped": result["skipped"],
+        }
+        manifest.record_snapshot(file_path, version, summary)
+        summaries[file_path] = dict(result, pages=summary["pages"], cached=False)
+
+    winners = pick_winners(file_paths, {path: summary["pages"] for path, summary in summaries.items()})
+    stale = {}
+    for file_name, (uri, file_path) in winners.items():
+        out_path = os.path.join(out_dir, file_name)
+        if force or not manifest.is_fresh(out_path, [file_path], version):
+            stale[file_name] = (uri, file_path, out_path)
+
+    # A stale output whose snapshot was served from the manifest still has
+    # to be rendered; decode just those snapshots.
+    results.update(run_pool(sorted({path for _, path, _ in stale.values() if path not in results}), workers))
+    written = set()
+    for file_name, (uri, file_path, out_path) in stale.items():
+        result = results[file_path]
+        text = next((page["text"] for page in result["pages"] if page["uriPath"] == uri), None)
+        if text is None:
+            # The snapshot changed since the manifest listed its pages.
+            error = result["error"] or f"page {uri} no longer has sections"
+            summaries[file_path] = dict(summaries[file_path], error=error)
+            continue
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        with stage("write") as st:
+            with open(out_path, "w", encoding="utf-8") as out:
+                out.write(text)
+            st.output(out_path)
+        manifest.record(out_path, [file_path], version, uriPath=uri)
+        written.add(file_name)
+    manifest.save()
+
+    report = {
+        "snapshots": [
+            {key: value for key, value in summaries[path].items() if key != "pages"}
+            | {"pages": [page["uriPath"] for page in summaries[path]["pages"]]}
+            for path in file_paths
+        ],
+        "outputs": {file_name: {"uriPath": uri, "snapshot": file_path, "rebuilt": file_name in written}
+                    for file_name, (uri, file_path) in winners.items()},
+        "errors": [{"snapshot": path, "error": summaries[path]["error"]}
+                   for path in file_paths if summaries[path]["error"]],
+        "skipped": [{"snapshot": path, "reason": summaries[path]["skipped"]}
+                    for path in file_paths if summaries[path].get("skipped")],
+    }
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract every snapshot in parallel.")
+    parser.add_argument("inputs", nargs="*", default=["temp_*.html"],
+                        help="snapshot files, directories or globs (default: temp_*.html)")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--workers", type=int, default=None, help="default: one per core; 1 extracts in this process")
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--force", action="store_true", help="rebuild every output")
+    args = parser.parse_args(argv)
+
+    file_paths = expand_inputs(args.inputs)
+    if not file_paths:
+        print("No snapshots found.")
+        return 1
+
+    report = batch_extract(file_paths, args.out_dir, args.workers, args.report, args.force)
+    for file_name, info in report["outputs"].items():
+        if info["rebuilt"]:
+            print(f"{info['uriPath']} -> {file_name} (from {info['snapshot']})")
+    for skipped in report["skipped"]:
+        print(f"Skipped {skipped['snapshot']}: {skipped['reason']}")
+    for error in report["errors"]:
+        print(f"FAILED {error['snapshot']}: {error['error']}")
+    rebuilt = sum(info["rebuilt"] for info in report["outputs"].values())
+    print(f"{len(report['outputs'])} outputs ({rebuilt} rebuilt), {len(report['skipped'])} skipped, "
+          f"{len(report['errors'])} errors. Report: {args.report}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from extract_curso_adv import extract_sections, find_sections
+from records import Link, Section
+
+# The per-section extraction as it was before visit_section: five find_all
+# walks and get_text twice per paragraph. Kept here as the reference.
+def legacy_sections(soup):
+    extracted_sections = []
+    for i, section in enumerate(find_sections(soup)):
+        classes = section.get('class', [])
+        if i == 0 and ('navigation' in str(classes) or 'nav' in str(classes)):
+            continue
+
+        headers = [h.get_text(strip=True) for h in section.find_all(['h1', 'h2', 'h3', 'h4', 'h5'])]
+        paragraphs = [p.get_text(strip=True) for p in section.find_all('p') if p.get_text(strip=True)]
+        images = []
+        for img in section.find_all('img'):
+            src = img.get('src') or img.get('data-src')
+            if src:
+                images.append(src)
+        buttons = []
+        for a in section.find_all('a'):
+            text = a.get_text(strip=True)
+            href = a.get('href')
+            if text and href:
+                buttons.append(Link(href=href, text=text))
+        list_items = [li.get_text(strip=True) for li in section.find_all('li')]
+
+        extracted_sections.append(Section(
+            id=f"section-{i}",
+            classes=classes,
+            headers=headers,
+            paragraphs=paragraphs,
+            images=images,
+            buttons=buttons,
+            list_items=list_items,
+        ))
+    return extracted_sections
+
+def best_of(fn, soup, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(soup)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main(file_path='temp_cursoadv.html', repeat=20):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+
+    legacy_time, legacy = best_of(legacy_sections, soup, repeat)
+    visitor_time, visited = best_of(extract_sections, soup, repeat)
+
+    identical = legacy == visited
+    print(f"{file_path}: {len(visited)} sections, best of {repeat}")
+    print(f"  five find_all walks : {legacy_time * 1000:8.2f} ms")
+    print(f"  single-pass visitor : {visitor_time * 1000:8.2f} ms")
+    print(f"  speedup             : {legacy_time / visitor_time:8.2f}x")
+    print(f"  identical sections  : {identical}")
+    return 0 if identical else 1
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:2]))
@@ -0,0 +1,151 @@
+"""fetch_pages.py against a local stand-in for the site.
+
+A server on a free port answers the candidate paths of PAGES with a page
+naming its path. For escola the first candidate is missing and the other
+two answer, the earlier-listed one much slower than the last. Every page
+is refreshed into a scratch directory as main() would, and one made-up
+page whose candidates are all missing goes through fetch_first. Then the
+preferred escola candidate disappears and the pages are refreshed again
+through the HTTP cache, where the fast one answers 304:
+
+- each snapshot must hold its earliest-listed candidate that answers,
+  however much faster a later one is, on both runs;
+- the candidates must be requested together (the requests overlap);
+- a page without a working candidate must return one error per candidate.
+
+Prints the wall time of each run and exits 1 on any mismatch.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fetch_pages import PAGES, Fetcher, page_candidates, refresh
+from http_cache import HttpCache
+
+SLOW_SECONDS = 0.3
+ESCOLA_MISSING, ESCOLA_SLOW, ESCOLA_FAST = PAGES["escola"][1]
+NOWHERE = ["/nowhere-1", "/nowhere-2"]
+
+
+class StandInSite:
+    """Every candidate path but `missing` answers with a page naming it,
+    or 304 when the request's If-None-Match is its ETag; `delays` maps a
+    path to how long it takes to answer."""
+
+    def __init__(self, missing=(), delays=None):
+        self.missing = set(missing)
+        self.delays = dict(delays or {})
+        self.in_flight = self.max_in_flight = self.requests = 0
+        lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def respond(self):
+                time.sleep(site.delays.get(self.path, 0))
+                body = site.body(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with lock:
+                    site.requests += 1
+                    site.in_flight += 1
+                    site.max_in_flight = max(site.max_in_flight, site.in_flight)
+                try:
+                    self.respond()
+                finally:
+                    with lock:
+                        site.in_flight -= 1
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def body(self, path):
+        known = {candidate for _, candidates in PAGES.values() for candidate in candidates}
+        if path not in known or path in self.missing:
+            return None
+        return f"<html><body>{path}</body></html>".encode()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run fetch_pages against a local stand-in site.")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    site = StandInSite(missing=[ESCOLA_MISSING], delays={ESCOLA_SLOW: SLOW_SECONDS})
+    problems = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="fetch_") as scratch:
+            cache = HttpCache(os.path.join(scratch, "cache"))
+            for run, escola in (("cold", ESCOLA_SLOW), ("cached", ESCOLA_FAST)):
+                if run == "cached":
+                    site.missing.add(ESCOLA_SLOW)
+                requests = site.requests
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    failed = refresh(base_url=site.base_url, out_dir=scratch, max_workers=args.workers,
+                                     cache=cache)
+                print(f"{run:<8} {len(PAGES)} pages, {len(failed)} failed, {site.requests - requests} requests, "
+                      f"{(time.perf_counter() - start) * 1000:.0f} ms")
+                if failed:
+                    problems.append(f"{run}: {failed} failed")
+                for name, (file_name, candidates) in PAGES.items():
+                    expected = site.body(escola if name == "escola" else candidates[0])
+                    with open(os.path.join(scratch, file_name), "rb") as f:
+                        if f.read() != expected:
+                            problems.append(f"{run}: {file_name} does not hold {expected.decode()}")
+
+        pages = dict(page_candidates(["mentoria"], site.base_url),
+                     nowhere=[site.base_url + path for path in NOWHERE])
+        with Fetcher(max_workers=args.workers) as fetcher:
+            results = fetcher.fetch_first(pages)
+        if isinstance(results["mentoria"], list) or results["mentoria"].status != 200:
+            problems.append(f"mentoria: {results['mentoria']}")
+        if not isinstance(results["nowhere"], list) or len(results["nowhere"]) != len(NOWHERE):
+            problems.append(f"nowhere: {results['nowhere']!r}, expected {len(NOWHERE)} errors")
+    finally:
+        site.close()
+
+    print(f"{site.base_url}: at most {site.max_in_flight} requests at once")
+    if site.max_in_flight < 2:
+        problems.append("candidates were not requested together")
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import glob
+import json
+import sys
+import time
+
+from extract_curso_adv import extract_sections
+from html_backend import available_backends, make_soup
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def outputs(soup):
+    """What the scripts produce from a soup: extract_curso_adv's sections
+    and page title, and extract_body's prettified body."""
+    if not soup.body:
+        return None
+    return json.dumps({
+        "page_title": soup.title.string if soup.title else None,
+        "sections": [section.to_dict() for section in extract_sections(soup)],
+        "body": soup.body.prettify(),
+    }, ensure_ascii=False)
+
+def main(pattern='temp_*.html', repeat=5):
+    backends = available_backends()
+    print(f"backends: {', '.join(backends)}; best of {repeat}")
+    print(f"{'fixture':<28}{'backend':<13}{'full ms':>9}{'strained ms':>13}  same output")
+
+    mismatches = 0
+    for file_path in sorted(glob.glob(pattern)):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        reference = outputs(make_soup(html, 'html.parser'))
+        if reference is None:
+            continue
+        for backend in backends:
+            full_time, _ = best_of(lambda: make_soup(html, backend), repeat)
+            strained_time, soup = best_of(lambda: make_soup(html, backend, only=['title', 'body']), repeat)
+            same = outputs(soup) == reference
+            mismatches += not same
+            print(f"{file_path:<28}{backend:<13}{full_time * 1000:9.1f}{strained_time * 1000:13.1f}  {same}")
+
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:2]))
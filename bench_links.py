@@ -0,0 +1,224 @@
+"""check_links.py against a local stand-in for the link hosts.
+
+Two servers on free ports stand in for two hosts. Between them they serve
+plain pages, 404s, pages that refuse HEAD, redirect chains (one of them
+crossing hosts), a redirect loop, slow pages and one that outlives the
+timeout. The links are written into fake extractor outputs and run
+through collect_links and check_links as main() would:
+
+- every link must get the expected status, method and redirect chain;
+- no host may see more than --per-host requests at once, and the slow
+  pages must still overlap up to that limit;
+- a second run must take every answered link from the cache (only the
+  timed-out one is checked again), and a run with an expired cache must
+  check everything again. The cache file must not hold the sources,
+  which belong to the run.
+
+Prints the wall time of each run and exits 1 on any mismatch.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from check_links import LinkCache, LinkChecker, check_links, collect_links
+
+SLOW_SECONDS = 0.3
+SLOW_PAGES = 8
+TIMEOUT = 1.0
+
+
+class StandInHost:
+    """One simulated host. `other` is the base URL cross-host redirects
+    point to; `max_in_flight` is the most requests it served at once."""
+
+    def __init__(self, other=None):
+        self.other = other
+        self.in_flight = self.max_in_flight = self.requests = 0
+        lock = threading.Lock()
+        host = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def respond(self, status, location=None, body=b""):
+                self.send_response(status)
+                if location:
+                    self.send_header("Location", location)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command == "GET":
+                    self.wfile.write(body)
+
+            def route(self):
+                path = self.path.split("?")[0]
+                if path == "/ok":
+                    return self.respond(200, body=b"ok")
+                if path == "/no-head":
+                    if self.command == "HEAD":
+                        return self.respond(405)
+                    if self.headers.get("Range") == "bytes=0-0":
+                        return self.respond(206, body=b"x")
+                    return self.respond(200, body=b"x" * 65536)
+                if path.startswith("/redirect/"):
+                    hops = int(path.rsplit("/", 1)[1])
+                    return self.respond(302, "/ok" if hops <= 1 else f"/redirect/{hops - 1}")
+                if path == "/loop":
+                    return self.respond(302, "/loop")
+                if path == "/moved":
+                    return self.respond(301, host.other + "/ok")
+                if path.startswith("/slow/"):
+                    time.sleep(SLOW_SECONDS)
+                    return self.respond(200)
+                if path == "/hang":
+                    time.sleep(TIMEOUT * 2)
+                    return self.respond(200)
+                if path == "/Matr%C3%ADculas.pdf":
+                    return self.respond(200)
+                return self.respond(404)
+
+            def handle_one(self):
+                # The client gives up on /hang after TIMEOUT and frees its
+                # slot while this thread still sleeps: not in flight.
+                counted = not self.path.startswith("/hang")
+                with lock:
+                    host.requests += 1
+                    host.in_flight += counted
+                    host.max_in_flight = max(host.max_in_flight, host.in_flight)
+                try:
+                    self.route()
+                finally:
+                    with lock:
+                        host.in_flight -= counted
+
+            do_HEAD = do_GET = handle_one
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def expected(a, b):
+    """url -> (ok, status, method, redirect hops, error substring)."""
+    cases = {
+        f"{a}/ok": (True, 200, "HEAD", 0, None),
+        f"{a}/missing": (False, 404, "GET", 0, None),
+        f"{a}/no-head": (True, 206, "GET", 0, None),
+        f"{a}/redirect/3": (True, 200, "HEAD", 3, None),
+        f"{a}/moved": (True, 200, "HEAD", 1, None),
+        f"{a}/loop": (False, 302, "HEAD", 6, "too many redirects"),
+        f"{a}/hang": (False, None, "HEAD", 0, "timed out"),
+        f"{b}/Matrículas.pdf": (True, 200, "HEAD", 0, None),
+        f"{b}/gone": (False, 404, "GET", 0, None),
+    }
+    for i in range(SLOW_PAGES):
+        cases[f"{b}/slow/{i}"] = (True, 200, "HEAD", 0, None)
+    return cases
+
+
+def write_outputs(out_dir, urls):
+    """Fake extractor outputs holding `urls`: half as download links, half
+    as buttons, plus hrefs that are not checked. Returns their paths."""
+    half = len(urls) // 2
+    downloads = [{"type": "link", "href": url, "text": "Baixar"} for url in urls[:half]]
+    downloads.append({"type": "link", "href": "mailto:contato@mybid.com.br", "text": "E-mail"})
+    json_path = os.path.join(out_dir, "downloads_data.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(downloads, f, indent=2)
+    txt_path = os.path.join(out_dir, "mentoria_data.txt")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write("Page Title: Mentoria\n--------------------\nCategory: text\n")
+        for url in urls[half:]:
+            f.write(f"Button: Quero fazer parte -> {url}\n")
+        f.write("Button: Contato -> #contato\nButton: WhatsApp -> whatsapp://send?phone=5511999999999\n"
+                + "=" * 20 + "\n")
+    return [json_path, txt_path]
+
+
+def verify(results, cases):
+    problems = []
+    if set(results) != set(cases):
+        problems.append(f"links found {sorted(set(results) ^ set(cases))} differ from the ones written")
+    for url, (ok, status, method, hops, error) in cases.items():
+        result = results.get(url)
+        if result is None:
+            continue
+        got = (result["ok"], result["status"], result["method"], len(result["redirects"]))
+        if got != (ok, status, method, hops) or (error and error not in (result["error"] or "")):
+            problems.append(f"{url}: got {got} {result['error']!r}, expected {(ok, status, method, hops)} {error!r}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run check_links against local stand-in hosts.")
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    b = StandInHost()
+    a = StandInHost(other=b.base_url)
+    cases = expected(a.base_url, b.base_url)
+    problems = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="links_") as scratch:
+            links = collect_links(write_outputs(scratch, list(cases)))
+            cache = LinkCache(os.path.join(scratch, "link_cache.json"))
+
+            unanswered = sum(1 for case in cases.values() if case[1] is None)
+            for run, run_cache, expect_checked in (("cold", cache, len(cases)), ("cached", cache, unanswered),
+                                                   ("expired", LinkCache(cache.path, max_age=0), len(cases))):
+                requests = a.requests + b.requests
+                start = time.perf_counter()
+                with LinkChecker(args.workers, args.per_host, TIMEOUT) as checker:
+                    results, checked = check_links(links, checker, run_cache)
+                seconds = time.perf_counter() - start
+                run_cache.save()
+                sent = a.requests + b.requests - requests
+                print(f"{run:<8} {len(results)} links, {checked} checked, {sent} requests, {seconds * 1000:.0f} ms")
+                problems += [f"{run}: {problem}" for problem in verify(results, cases)]
+                if checked != expect_checked:
+                    problems.append(f"{run}: {checked} links checked, expected {expect_checked}")
+                if run == "cached" and sent != unanswered:
+                    problems.append(f"cached: {sent} requests sent, expected {unanswered}")
+                with open(run_cache.path, "r", encoding="utf-8") as f:
+                    if any("sources" in result for result in json.load(f).values()):
+                        problems.append(f"{run}: the cache file holds the run's sources")
+
+            # The slow pages take SLOW_SECONDS each; checked per_host at a
+            # time they need this long, and not much more.
+            least = SLOW_PAGES / args.per_host * SLOW_SECONDS
+            slow = max(results[f"{b.base_url}/slow/{i}"]["seconds"] for i in range(SLOW_PAGES))
+            print(f"slow pages: {slow * 1000:.0f} ms for {SLOW_PAGES} (at least {least * 1000:.0f} ms at "
+                  f"{args.per_host} per host)")
+            if slow > least + TIMEOUT:
+                problems.append(f"slow pages took {slow:.2f}s, they are not checked concurrently")
+    finally:
+        a.close()
+        b.close()
+
+    for host in (a, b):
+        print(f"{host.base_url}: at most {host.max_in_flight} requests at once")
+        if host.max_in_flight > args.per_host:
+            problems.append(f"{host.base_url} saw {host.max_in_flight} requests at once, limit {args.per_host}")
+    if b.max_in_flight < min(args.per_host, SLOW_PAGES):
+        problems.append(f"{b.base_url} never saw {args.per_host} requests at once")
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
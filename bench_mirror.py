@@ -0,0 +1,203 @@
+"""mirror_images.py against a local stand-in image host.
+
+A server on a free port serves small PNG and GIF images with some latency,
+the same bytes under several URLs, a redirect to an image, a 404 and a
+PNG whose header claims 20000 x 20000 pixels (a decompression bomb to
+Pillow). Their URLs are written into fake extractor outputs and mirrored
+as main() would:
+
+- every image must land in the manifest, byte for byte, with URLs that
+  serve the same bytes sharing one file;
+- the 404 must be reported and nothing else;
+- the host must never see more than --workers requests at once, and must
+  see them overlap;
+- the bomb must be mirrored without variants rather than stop the run
+  (with Pillow installed, the other images must get their variants);
+- a second run must download nothing but retry the failure.
+
+Prints the wall time of each run and exits 1 on any mismatch.
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mirror_images import MANIFEST_NAME, collect_urls, mirror_images
+
+LATENCY = 0.05
+IMAGES = 24
+# Same bytes as /img/0.png.
+DUPLICATES = 3
+
+
+def png(width, height, seed, pixels=True):
+    """A valid RGB PNG of one colour per row; with pixels=False only the
+    header is real, which is all Pillow reads before refusing a bomb."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    raw = b"".join(b"\0" + bytes([(seed + y) % 256, seed % 256, y % 256]) * width for y in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw if pixels else b"\0")) + chunk(b"IEND", b""))
+
+
+GIF = b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00" \
+      b",\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+
+
+class StandInImageHost:
+    def __init__(self):
+        self.bodies = {f"/img/{i}.png": (png(600 + 40 * i, 300, i), "image/png") for i in range(IMAGES)}
+        for i in range(DUPLICATES):
+            self.bodies[f"/copy/{i}"] = self.bodies["/img/0.png"]
+        self.bodies["/pixel.gif"] = (GIF, "image/gif")
+        self.bodies["/bomb.png"] = (png(20000, 20000, 0, pixels=False), "image/png")
+        self.in_flight = self.max_in_flight = self.requests = 0
+        lock = threading.Lock()
+        host = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def respond(self):
+                time.sleep(LATENCY)
+                if self.path == "/old-pixel":
+                    self.send_response(301)
+                    self.send_header("Location", "/pixel.gif")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                found = host.bodies.get(self.path)
+                if found is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, content_type = found
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with lock:
+                    host.requests += 1
+                    host.in_flight += 1
+                    host.max_in_flight = max(host.max_in_flight, host.in_flight)
+                try:
+                    self.respond()
+                finally:
+                    with lock:
+                        host.in_flight -= 1
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def write_outputs(out_dir, urls):
+    """Fake extractor outputs referencing `urls`: the first half as Image:
+    lines of a *_data.txt, the rest as images of a curso_adv-style JSON.
+    Every URL is written twice. Returns their paths."""
+    half = len(urls) // 2
+    txt_path = os.path.join(out_dir, "escola_data.txt")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write("Page Title: Escola\n--------------------\nCategory: gallery\nGallery Items:\n")
+        for url in urls[:half] * 2:
+            f.write(f"  - Image: {url}\n")
+        f.write("=" * 20 + "\n")
+    json_path = os.path.join(out_dir, "curso_adv_data.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"title": "Curso", "sections": [{"images": urls[half:]}, {"images": urls[half:]}]}, f)
+    return [txt_path, json_path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run mirror_images against a local stand-in image host.")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    try:
+        import PIL  # noqa: F401
+        has_pillow = True
+    except ImportError:
+        has_pillow = False
+
+    host = StandInImageHost()
+    base = host.base_url
+    good = {base + path: body for path, (body, _) in host.bodies.items()}
+    good[base + "/old-pixel"] = host.bodies["/pixel.gif"][0]
+    missing = base + "/gone.png"
+    problems = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="mirror_") as scratch:
+            urls = collect_urls(write_outputs(scratch, sorted(good) + [missing]))
+            if sorted(urls) != sorted(list(good) + [missing]):
+                problems.append(f"collect_urls found {len(urls)} URLs, expected {len(good) + 1}")
+            out_dir = os.path.join(scratch, "mirror")
+
+            for run, expect_downloaded in (("cold", len(good)), ("resumed", 0)):
+                requests = host.requests
+                start = time.perf_counter()
+                downloaded, skipped, errors = mirror_images(urls, out_dir, "/mirror", args.workers)
+                seconds = time.perf_counter() - start
+                print(f"{run:<8} {downloaded} downloaded, {skipped} skipped, {len(errors)} failed, "
+                      f"{host.requests - requests} requests, {seconds * 1000:.0f} ms")
+                if downloaded != expect_downloaded:
+                    problems.append(f"{run}: {downloaded} downloaded, expected {expect_downloaded}")
+                if list(errors) != [missing]:
+                    problems.append(f"{run}: failures {sorted(errors)}, expected only {missing}")
+                if run == "resumed" and host.requests - requests != 1:
+                    problems.append(f"resumed: {host.requests - requests} requests, expected 1 (the 404)")
+
+            with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            for url, body in good.items():
+                entry = manifest.get(url)
+                if entry is None:
+                    problems.append(f"{url} not in the manifest")
+                    continue
+                with open(os.path.join(out_dir, entry["file"]), "rb") as f:
+                    if f.read() != body:
+                        problems.append(f"{url}: mirrored bytes differ")
+                wants_variants = has_pillow and not url.endswith("/bomb.png")
+                if bool(entry.get("variants")) != wants_variants:
+                    problems.append(f"{url}: variants {entry.get('variants')}, expected {wants_variants}")
+            shared = {manifest[base + f"/copy/{i}"]["file"] for i in range(DUPLICATES)}
+            if shared != {manifest[base + "/img/0.png"]["file"]}:
+                problems.append(f"duplicate bodies stored as {sorted(shared)}")
+            originals = [name for name in os.listdir(out_dir) if name != MANIFEST_NAME and "-" not in name]
+            if len(originals) != len(good) - DUPLICATES - 1:
+                problems.append(f"{len(originals)} original files, expected {len(good) - DUPLICATES - 1}")
+    finally:
+        host.close()
+
+    print(f"{base}: at most {host.max_in_flight} requests at once"
+          + ("" if has_pillow else "; Pillow not installed, variants not checked"))
+    if host.max_in_flight > args.workers:
+        problems.append(f"{host.max_in_flight} requests at once, limit {args.workers}")
+    if host.max_in_flight < 2:
+        problems.append("requests never overlapped")
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
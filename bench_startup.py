@@ -0,0 +1,106 @@
+"""Cold-start cost of the elance.py commands, from `python -X importtime`.
+
+Each command runs in a fresh interpreter, in a scratch directory (the
+outputs land there), on the checked-in snapshots. For every command this
+prints the time spent importing, the number of modules imported, the
+slowest imports and the best wall time of a few runs, next to a bare
+`python -c pass` for reference.
+
+It exits 1 when a command imports a module it should not need (bs4 for
+the JSON extractors, the HTTP stack for extraction, tracemalloc when not
+instrumenting, ...), or, with --max-import-ms, takes longer than that
+importing.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.join(HERE, "elance.py")
+
+# Loaded only on demand by the pipeline.
+HEAVY = {"bs4", "lxml", "PIL", "zstandard", "tracemalloc", "http.client", "concurrent.futures"}
+
+
+def snapshot(name):
+    return os.path.join(HERE, name)
+
+
+# (label, elance.py arguments, heavy modules the command may import)
+COMMANDS = [
+    ("help", [], set()),
+    ("extract mentoria", ["extract", "mentoria", snapshot("temp_mentoria.html"), "--force"], set()),
+    ("extract escola", ["extract", "escola", snapshot("temp_escola.html"), "--force"], set()),
+    ("extract ecossistema", ["extract", "ecossistema", snapshot("temp_ecossistema.html"), "--force"], set()),
+    ("extract indique", ["extract", "indique", snapshot("temp_indique.html"), "--force"], set()),
+    ("extract downloads", ["extract", "downloads", snapshot("temp_downloads.html"), "--force"], set()),
+    ("extract site", ["extract", "site", snapshot("temp_escola.html")], set()),
+    ("inspect pages", ["inspect", "pages", snapshot("temp_mybid.html")], set()),
+    # bs4 loads lxml itself when it is installed.
+    ("extract curso-adv", ["extract", "curso-adv", snapshot("temp_cursoadv.html"), "--force"], {"bs4", "lxml"}),
+    ("fetch --help", ["fetch", "--help"], {"http.client", "concurrent.futures"}),
+]
+
+
+def parse_importtime(stderr):
+    """[(module, self µs, cumulative µs)] from -X importtime output.
+
+    Module names keep their indentation, two spaces per level of nesting.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def run(args, cwd, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + args
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with {proc.returncode}:\n{proc.stderr[-2000:]}")
+    return seconds, proc.stderr
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cold start of the elance.py commands.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per command (best one counts)")
+    parser.add_argument("--max-import-ms", type=float, help="fail a command spending longer than this importing")
+    parser.add_argument("--top", type=int, default=3, help="slowest imports to show per command")
+    args = parser.parse_args(argv)
+
+    print(f"{'command':<22}{'modules':>8}{'import ms':>11}{'wall ms':>9}  slowest imports (cumulative ms)")
+    problems = []
+    with tempfile.TemporaryDirectory(prefix="startup_") as scratch:
+        bare = min(run(["-c", "pass"], scratch)[0] for _ in range(args.repeat))
+        print(f"{'python -c pass':<22}{'':>8}{'':>11}{bare * 1000:9.1f}")
+        for label, cli_args, allowed in COMMANDS:
+            _, stderr = run([CLI] + cli_args, scratch, importtime=True)
+            imports = parse_importtime(stderr)
+            wall = min(run([CLI] + cli_args, scratch)[0] for _ in range(args.repeat))
+
+            import_ms = sum(self_us for _, self_us, _ in imports) / 1000
+            top_level = sorted((imp for imp in imports if not imp[0].startswith(" ")), key=lambda imp: -imp[2])
+            slowest = ", ".join(f"{name} {cumulative / 1000:.1f}" for name, _, cumulative in top_level[:args.top])
+            print(f"{label:<22}{len(imports):>8}{import_ms:>11.1f}{wall * 1000:9.1f}  {slowest}")
+
+            loaded = {name.strip() for name, _, _ in imports}
+            for module in sorted((HEAVY - allowed) & loaded):
+                problems.append(f"{label}: imports {module}")
+            if args.max_import_ms is not None and import_ms > args.max_import_ms:
+                problems.append(f"{label}: {import_ms:.1f} ms importing, limit {args.max_import_ms}")
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""End-to-end benchmarks over the temp_*.html snapshots.
+
+Each case runs an extractor the way its script does (output files,
+manifest and all, inside a scratch directory) on a checked-in snapshot and
+on synthetic scale-ups of it:
+
+- window._site pages: the target page's sections and the whole page list
+  repeated N times (fresh ids and uriPaths), so locate, decode and the
+  section walk all grow;
+- HTML pages: everything from the first <section> to the last </section>
+  repeated N times.
+
+A case reports the best wall time of a few runs as input MB/s, and the
+peak traced memory of one more run under tracemalloc (kept apart, since
+tracing slows allocation down). --save-baseline stores the figures;
+later runs compare against them and exit 1 when a case gets slower or
+takes more memory than the thresholds allow. A case whose extractor
+raises, or does not write its output, fails the suite.
+"""
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boilerplate
+import rich_text
+from extract_curso_adv import OUTPUT_FILE as CURSO_ADV_OUTPUT, extract_data
+from extract_downloads import DownloadFilter, MyHTMLParser, feed_file
+from extract_ecossistema_json import OUTPUT_FILE as ECOSSISTEMA_OUTPUT, extract_ecossistema_data
+from extract_escola_json import OUTPUT_FILE as ESCOLA_OUTPUT, extract_escola_data
+from extract_indique_json import OUTPUT_FILE as INDIQUE_OUTPUT, extract_indique_data
+from extract_mentoria_json import OUTPUT_FILE as MENTORIA_OUTPUT, extract_mentoria_data
+from fetch_pages import Fetcher
+from site_json import _decoder, find_site, script_end
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(HERE, "bench_baseline.json")
+
+# A case fails when its throughput drops, or its peak memory grows, by
+# more than these fractions of the baseline.
+SPEED_THRESHOLD = 0.25
+MEMORY_THRESHOLD = 0.10
+
+SITE_CASES = {
+    "mentoria": (extract_mentoria_data, MENTORIA_OUTPUT, "temp_mentoria.html", "mentoria-trilha-do-arrematante"),
+    "escola": (extract_escola_data, ESCOLA_OUTPUT, "temp_escola.html", "escola-de-formagco-para-novos-leiloeiros"),
+    "ecossistema": (extract_ecossistema_data, ECOSSISTEMA_OUTPUT, "temp_ecossistema.html",
+                    "o-ecossistema-e-lance-e-my-bid"),
+    "indique": (extract_indique_data, INDIQUE_OUTPUT, "temp_indique.html",
+                "indique-a-e-lance-para-realizar-o-seu-leilao"),
+}
+
+
+def scale_site(raw, uri, factor):
+    """`raw` with page `uri`'s sections and the page list repeated."""
+    start = find_site(raw)
+    end = script_end(raw, start)
+    text = raw[start:end].decode("utf-8")
+    site, used = _decoder.raw_decode(text)
+
+    pages = []
+    for copy in range(factor):
+        for page in site["pages"]:
+            if copy == 0:
+                pages.append(page)
+            elif page.get("uriPath") != uri:
+                pages.append(dict(page, uriPath=f"{page.get('uriPath')}-{copy}", sections=[]))
+    for page in pages:
+        if page.get("uriPath") == uri:
+            sections = page.get("sections") or []
+            page["sections"] = [dict(section, id=f"{section.get('id')}-{copy}")
+                                for copy in range(factor) for section in sections]
+    site["pages"] = pages
+    value_end = start + len(text[:used].encode("utf-8"))
+    return raw[:start] + json.dumps(site).encode("utf-8") + raw[value_end:]
+
+
+def scale_html(raw, factor):
+    """`raw` with everything from the first <section> to the last
+    </section> repeated."""
+    first = raw.find(b"<section")
+    last = raw.rfind(b"</section>")
+    if first == -1 or last == -1:
+        return raw
+    last += len(b"</section>")
+    return raw[:first] + raw[first:last] * factor + raw[last:]
+
+
+def fixture(name, factor, make, out_dir):
+    """Path of snapshot `name` scaled `factor` times (written on first use)."""
+    src = os.path.join(HERE, name)
+    if factor == 1:
+        return src
+    path = os.path.join(out_dir, f"x{factor}_{name}")
+    if not os.path.exists(path):
+        with open(src, "rb") as f:
+            raw = f.read()
+        with open(path, "wb") as f:
+            f.write(make(raw, factor))
+    return path
+
+
+def cold():
+    """Forget what earlier runs cached, so each run starts like a new process."""
+    rich_text.plain_text.cache_clear()
+    rich_text.safe_markup.cache_clear()
+    boilerplate.is_boilerplate.cache_clear()
+
+
+def writes(output, extract):
+    """`extract`, raising RuntimeError unless it writes `output` afresh.
+
+    The window._site extractors print their errors instead of raising, so
+    a broken one would otherwise be timed as a fast success.
+    """
+    def run():
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(output)
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            extract()
+        if not os.path.exists(output):
+            raise RuntimeError(f"{output} not written: {printed.getvalue().strip() or 'no message'}")
+    return run
+
+
+def feed_filter(path):
+    parser = MyHTMLParser()
+    feed_file(parser, path)
+    keep = DownloadFilter()
+    return [item for item in parser.data if keep(item)]
+
+
+class FixtureServer:
+    """Local stand-in for the site: serves the snapshots from memory at
+    /<file name>, with keep-alive, on a free port."""
+
+    def __init__(self, names):
+        bodies = {}
+        for name in names:
+            with open(os.path.join(HERE, name), "rb") as f:
+                bodies["/" + name] = f.read()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = bodies.get(self.path.split("?")[0])
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def fetch_urls(base_url, names, factor):
+    return [f"{base_url}/{name}?copy={copy}" for copy in range(factor) for name in names]
+
+
+def fetch_all(urls):
+    with Fetcher(max_workers=8) as fetcher:
+        results = fetcher.fetch_all(urls)
+    failed = [url for url, result in results.items() if isinstance(result, Exception)]
+    if failed:
+        raise RuntimeError(f"{len(failed)} fetches failed, e.g. {failed[0]}")
+    return sum(len(result.body) for result in results.values())
+
+
+def cases(scratch, server, snapshots):
+    """(name, input bytes, function) for every benchmark."""
+    for name, (extract, output, snapshot, uri) in SITE_CASES.items():
+        for factor in (1, 10, 100):
+            path = fixture(snapshot, factor, lambda raw, n, uri=uri: scale_site(raw, uri, n), scratch)
+            yield (f"{name}_json x{factor}", os.path.getsize(path),
+                   writes(output, lambda e=extract, p=path: e(p, force=True)))
+
+    for factor in (1, 10, 100):
+        path = fixture("temp_downloads.html", factor, scale_html, scratch)
+        yield f"downloads_feed_filter x{factor}", os.path.getsize(path), lambda p=path: feed_filter(p)
+
+    # At 100x, html.parser alone takes several seconds a run and would
+    # dominate the suite; 10x already shows how it scales.
+    for factor in (1, 10):
+        path = fixture("temp_cursoadv.html", factor, scale_html, scratch)
+        yield (f"curso_adv_extract_data x{factor}", os.path.getsize(path),
+               writes(CURSO_ADV_OUTPUT, lambda p=path: extract_data(p, force=True)))
+
+    for factor in (1, 10):
+        urls = fetch_urls(server.base_url, snapshots, factor)
+        size = sum(os.path.getsize(os.path.join(HERE, name)) for name in snapshots) * factor
+        yield f"fetch x{factor}", size, lambda u=urls: fetch_all(u)
+
+
+def measure(fn, repeat):
+    """(best seconds, peak traced bytes) of `fn`."""
+    best = float("inf")
+    for _ in range(repeat):
+        cold()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    cold()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def compare(results, baseline, speed_threshold, memory_threshold):
+    """Lines describing each regression against `baseline`."""
+    problems = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["mb_per_s"] < base["mb_per_s"] * (1 - speed_threshold):
+            problems.append(f"{name}: {result['mb_per_s']:.2f} MB/s, baseline {base['mb_per_s']:.2f}")
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + memory_threshold):
+            problems.append(f"{name}: peak {result['peak_bytes']} bytes, baseline {base['peak_bytes']}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the extractors and the fetch path on the snapshots.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (best one counts)")
+    parser.add_argument("--only", nargs="+", help="run only the cases matching these globs, e.g. 'escola*' '*x100'")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--speed-threshold", type=float, default=SPEED_THRESHOLD)
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD)
+    parser.add_argument("--json", help="also write the results here")
+    args = parser.parse_args(argv)
+
+    snapshots = sorted(name for name in os.listdir(HERE) if name.startswith("temp_") and name.endswith(".html"))
+    results = {}
+    failed = []
+    print(f"{'case':<32}{'MB':>8}{'best ms':>10}{'MB/s':>9}{'peak MB':>10}")
+    server = FixtureServer(snapshots)
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_") as scratch:
+            # The extractors write their outputs and manifest here.
+            os.chdir(scratch)
+            for name, size, fn in cases(scratch, server, snapshots):
+                if args.only and not any(fnmatch.fnmatch(name, pattern) for pattern in args.only):
+                    continue
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        seconds, peak = measure(fn, args.repeat)
+                except Exception as e:
+                    failed.append(name)
+                    print(f"{name:<32}FAILED {type(e).__name__}: {e}")
+                    continue
+                results[name] = {"input_bytes": size, "seconds": round(seconds, 6),
+                                 "mb_per_s": round(size / seconds / 1e6, 3), "peak_bytes": peak}
+                print(f"{name:<32}{size / 1e6:8.2f}{seconds * 1000:10.1f}{size / seconds / 1e6:9.2f}"
+                      f"{peak / 1e6:10.2f}")
+    finally:
+        os.chdir(cwd)
+        server.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        print(f"{len(failed)} cases failed; nothing compared or saved.")
+        return 1
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to store one.")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        problems = compare(results, json.load(f), args.speed_threshold, args.memory_threshold)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    print(f"{len(results)} cases, {len(problems)} regressions against {args.baseline}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Spot the placeholder text the site builder fills new sections with.
+
+Texts are compared after normalize() (case, punctuation and spacing do not
+matter) through a set of their hashes, so an exact placeholder costs one
+lookup. Near duplicates, e.g. a placeholder pasted twice or lightly edited,
+are caught by word shingles: a text whose shingles mostly belong to known
+placeholders counts as one too.
+
+Some placeholders are also ordinary labels ("Image", "Chef", "Read
+more"). They are listed per field in FIELD_PLACEHOLDERS and only match,
+exactly, in that field.
+"""
+import hashlib
+import re
+from functools import lru_cache
+
+PLACEHOLDERS = (
+    "Add a title",
+    "Add a description here.",
+    "Add your description here.",
+    "Describe the picture or give more information.",
+    "Learn more about what we do",
+    "This is a footnote",
+    "You can edit text by clicking on a text box",
+    "You can edit text on your website by double clicking on a text box on your website. "
+    "Alternatively, when you select a text box a settings menu will appear. Selecting 'Edit Text' "
+    "from this menu will also allow you to edit the text within this text box. Remember to keep "
+    "your wording friendly, approachable and easy to understand as if you were talking to your customer.",
+    "You can use this element to explain to visitors what you do or inform them about other subjects. "
+    "For instance, what is your passion and why or what does your company offer, i.e. products and "
+    "services. You can hide this element in the menu on the right.",
+)
+
+# Field -> the template's defaults for it that are too generic to drop
+# anywhere else. Fields are the record attributes (title, subtitle, ...)
+# and "button" for button labels.
+FIELD_PLACEHOLDERS = {
+    'title': ("Image",),
+    'subtitle': ("Subtitle", "Chef", "Head Chef", "Assistent Chef", "Get in touch"),
+    'button': ("Read more", "More", "Tell me more"),
+}
+
+NON_WORD = re.compile(r'[\W_]+')
+SHINGLE_WORDS = 3
+# Share of a text's shingles that must belong to placeholders.
+NEAR_DUPLICATE = 0.8
+
+
+def normalize(text):
+    return NON_WORD.sub(' ', text.casefold()).strip()
+
+
+def text_hash(normalized):
+    return int.from_bytes(hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def shingles(words, size=SHINGLE_WORDS):
+    return {hash(tuple(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+class BoilerplateFilter:
+    """`text in filter` is true for known placeholder text;
+    `filter.matches(text, field)` also tries the placeholders of `field`.
+
+    Extend it with add(). With `near=False` only exact (normalized)
+    matches count.
+    """
+
+    def __init__(self, texts=PLACEHOLDERS, near=True, threshold=NEAR_DUPLICATE, fields=FIELD_PLACEHOLDERS):
+        self.near = near
+        self.threshold = threshold
+        self.hashes = set()
+        self.shingles = set()
+        self.field_hashes = {}
+        for text in texts:
+            self.add(text)
+        for field, field_texts in fields.items():
+            for text in field_texts:
+                self.add(text, field)
+
+    def add(self, text, field=None):
+        """Add a placeholder; with `field`, one that only counts there."""
+        normalized = normalize(text)
+        if field is not None:
+            self.field_hashes.setdefault(field, set()).add(text_hash(normalized))
+            return
+        self.hashes.add(text_hash(normalized))
+        self.shingles |= shingles(normalized.split())
+
+    def __contains__(self, text):
+        return self.matches(text)
+
+    def matches(self, text, field=None):
+        normalized = normalize(text)
+        if not normalized:
+            return False
+        digest = text_hash(normalized)
+        if digest in self.hashes or digest in self.field_hashes.get(field, ()):
+            return True
+        if not self.near:
+            return False
+        own = shingles(normalized.split())
+        return bool(own) and len(own & self.shingles) >= self.threshold * len(own)
+
+
+DEFAULT_FILTER = BoilerplateFilter()
+
+
+@lru_cache(maxsize=4096)
+def is_boilerplate(text, field=None):
+    return DEFAULT_FILTER.matches(text, field)
@@ -0,0 +1,357 @@
+"""Check that the links in the extracted outputs still answer.
+
+Every href in the JSON outputs (downloads_data.json, curso_adv_data.json)
+and every `Button: ... -> href` / `Link: href` line of the *_data.txt
+outputs is checked, concurrently, with at most a few requests in flight
+per host. A link is asked for with HEAD first; when HEAD fails (many file
+hosts answer it 403, 404 or 405) the same URL is asked again with a
+one-byte ranged GET. Redirects are followed hop by hop and every hop is
+recorded.
+
+Builder references (page:<id>) are resolved against the pages of a
+window._site snapshot; relative hrefs against --base-url. mailto:, tel:,
+whatsapp: (the schemes link_classifier ignores) and #anchors are not
+checked.
+
+Results are kept in .link_cache.json for --max-age-hours, so a repeat run
+only re-checks links whose result is older than that. Links no host
+answered for (DNS, refused, timed out) are not cached: they are checked
+again on every run. The command exits 1 when any link is broken.
+"""
+import argparse
+import glob
+import http.client
+import json
+import os
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from fetch_pages import BASE_URL, MAX_REDIRECTS, ConnectionPool, headers
+from link_classifier import IGNORED_SCHEMES
+
+LINK_CACHE = ".link_cache.json"
+REPORT_FILE = "link_report.json"
+SITE_SNAPSHOT = "temp_mybid.html"
+MAX_AGE = 24 * 3600
+PER_HOST = 4
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# The schemes link_classifier ignores, and anchors.
+SKIPPED_SCHEMES = IGNORED_SCHEMES + ("#",)
+# A link that fails with one of these is broken, not the run.
+CHECK_ERRORS = (OSError, http.client.HTTPException, ValueError)
+
+
+def page_ids(snapshot):
+    """Builder page id -> uriPath, from a snapshot's window._site."""
+    from site_json import load_site
+
+    site = load_site(snapshot) or {}
+    return {str(page.get("id")): page.get("uriPath") for page in site.get("pages", [])}
+
+
+def iter_hrefs(path):
+    """(href, label) for every link in an extractor output."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            stack = [json.load(f)]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, dict):
+                if isinstance(value.get("href"), str):
+                    yield value["href"], (value.get("text") or "").strip()
+                stack.extend(value.values())
+            elif isinstance(value, list):
+                stack.extend(reversed(value))
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip().removeprefix("- ")
+            if line.startswith("Button: ") and " -> " in line:
+                label, href = line[len("Button: "):].rsplit(" -> ", 1)
+                yield href, label
+            elif line.startswith("Link: "):
+                yield line[len("Link: "):], ""
+
+
+def resolve_href(href, base_url, pages):
+    """Absolute URL for an href, None when it is not checked, or "" for a
+    page:<id> that no page has."""
+    href = href.strip()
+    if not href or href.lower().startswith(SKIPPED_SCHEMES):
+        return None
+    if href.startswith("page:"):
+        uri = pages.get(href[len("page:"):])
+        return "" if uri is None else base_url.rstrip("/") + "/" + uri.lstrip("/")
+    return urllib.parse.urljoin(base_url.rstrip("/") + "/", href)
+
+
+def collect_links(paths, base_url=BASE_URL, pages=None):
+    """url -> sources ("file: label") over every output in `paths`, in the
+    order the links first appear. Dangling page:<id> references are keyed
+    by the href itself."""
+    links = {}
+    for path in paths:
+        for href, label in iter_hrefs(path):
+            url = resolve_href(href, base_url, pages or {})
+            if url is None:
+                continue
+            source = f"{os.path.basename(path)}: {label}" if label else os.path.basename(path)
+            sources = links.setdefault(url or href, [])
+            if source not in sources:
+                sources.append(source)
+    return links
+
+
+class Check:
+    """One URL's check, advanced one request at a time: HEAD, then a ranged
+    GET when HEAD fails, then the same for every redirect hop."""
+
+    def __init__(self, url):
+        self.started = time.perf_counter()
+        self.current = url
+        self.method = "HEAD"
+        self.result = {"url": url, "ok": False, "status": None, "final_url": url, "redirects": [],
+                       "method": "HEAD", "error": None}
+
+    @property
+    def host(self):
+        return urllib.parse.urlsplit(self.current).netloc
+
+    def answered(self, status, location):
+        """Take the answer to the current request; True when the check is done."""
+        result = self.result
+        if self.method == "HEAD" and status >= 400:
+            self.method = "GET"
+            return False
+        result["status"], result["method"] = status, self.method
+        if status in REDIRECT_STATUSES and location:
+            result["redirects"].append([self.current, status])
+            self.current = urllib.parse.urljoin(self.current, location)
+            self.method = "HEAD"
+            if len(result["redirects"]) <= MAX_REDIRECTS:
+                return False
+            result["error"] = "too many redirects"
+            return True
+        result["ok"] = status < 400
+        return True
+
+    def failed(self, e):
+        self.result["error"] = f"{type(e).__name__}: {e}"
+
+    def finish(self):
+        self.result["final_url"] = self.current
+        self.result["checked_at"] = time.time()
+        self.result["seconds"] = round(time.perf_counter() - self.started, 3)
+        return self.result
+
+
+class LinkChecker:
+    """Checks links with `max_workers` threads and at most `per_host`
+    requests in flight to the same host.
+
+    Requests are queued per host and handed to the pool only while their
+    host has a free slot, so a slow host holds at most `per_host` workers
+    and the rest keep checking other hosts.
+    """
+
+    def __init__(self, max_workers=16, per_host=PER_HOST, timeout=10):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.pool = ConnectionPool(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    def _request(self, method, url):
+        """(status, Location header) of one request, redirects not followed."""
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise ValueError(f"not an http(s) URL: {url}")
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        # Hrefs may hold raw non-ASCII (fileName=Matrículas2.pdf); what is
+        # already escaped stays as is.
+        path = urllib.parse.quote(path, safe="/%?&=+:;,@!$'()*~")
+        req_headers = dict(headers)
+        if method == "GET":
+            req_headers["Range"] = "bytes=0-0"
+
+        # A reused connection may have been closed by the server while
+        # idle; retry once on a fresh one in that case.
+        for attempt in range(2):
+            conn, reused = self.pool.acquire(parts.scheme, parts.netloc)
+            try:
+                conn.request(method, path, headers=req_headers)
+                resp = conn.getresponse()
+                if method == "HEAD":
+                    resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            # A host ignoring Range sends the whole file: drop the
+            # connection rather than read it.
+            if method == "GET" or resp.will_close:
+                conn.close()
+            else:
+                self.pool.release(parts.scheme, parts.netloc, conn)
+            return resp.status, resp.getheader("Location")
+
+    def iter_check(self, urls):
+        """Check every URL concurrently, yielding results as they complete."""
+        queues = {}
+        in_flight = {}
+        running = {}
+
+        def start(host):
+            queue = queues.get(host)
+            while queue and in_flight.get(host, 0) < self.per_host:
+                check = queue.popleft()
+                in_flight[host] = in_flight.get(host, 0) + 1
+                running[executor.submit(self._request, check.method, check.current)] = check, host
+
+        def enqueue(check):
+            host = check.host
+            queues.setdefault(host, deque()).append(check)
+            start(host)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for url in urls:
+                    enqueue(Check(url))
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        check, host = running.pop(future)
+                        in_flight[host] -= 1
+                        try:
+                            finished = check.answered(*future.result())
+                        except CHECK_ERRORS as e:
+                            check.failed(e)
+                            finished = True
+                        if finished:
+                            yield check.finish()
+                        else:
+                            enqueue(check)
+                        start(host)
+            finally:
+                # Stopped early (e.g. Ctrl-C): do not start what is queued.
+                for future in running:
+                    future.cancel()
+
+
+class LinkCache:
+    """Earlier check results by URL, each trusted for `max_age` seconds."""
+
+    def __init__(self, path=LINK_CACHE, max_age=MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.results = json.load(f)
+        except (OSError, ValueError):
+            self.results = {}
+
+    def fresh(self, url, now=None):
+        result = self.results.get(url)
+        if result is None:
+            return None
+        now = time.time() if now is None else now
+        return result if now - result.get("checked_at", 0) < self.max_age else None
+
+    def store(self, result):
+        self.results[result["url"]] = result
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.results, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def check_links(links, checker, cache=None):
+    """url -> result for every link in `links` (see collect_links), checking
+    only what `cache` has no fresh result for. Returns (results, checked)."""
+    results = {}
+    stale = []
+    for url in links:
+        if not url.startswith(("http://", "https://")):
+            results[url] = {"url": url, "ok": False, "status": None, "final_url": url, "redirects": [],
+                            "method": None, "error": "no page with this id"}
+            continue
+        cached = cache.fresh(url) if cache is not None else None
+        if cached is not None:
+            results[url] = cached
+        else:
+            stale.append(url)
+
+    for result in checker.iter_check(stale):
+        results[result["url"]] = result
+        if cache is not None and result["status"] is not None:
+            cache.store(result)
+    # Copies: the results themselves are the cache's.
+    return {url: dict(results[url], sources=links[url]) for url in links}, len(stale)
+
+
+def default_outputs():
+    return sorted(path for path in glob.glob("*_data.json") + glob.glob("*_data.txt"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the links in the extracted outputs still answer.")
+    parser.add_argument("outputs", nargs="*", help="extractor outputs (default: *_data.json and *_data.txt)")
+    parser.add_argument("--base-url", default=BASE_URL, help="for relative hrefs")
+    parser.add_argument("--site", default=SITE_SNAPSHOT, help="snapshot whose window._site resolves page:<id>")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--per-host", type=int, default=PER_HOST, help="requests in flight per host")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--cache", default=LINK_CACHE)
+    parser.add_argument("--max-age-hours", type=float, default=MAX_AGE / 3600,
+                        help="re-check links whose result is older than this")
+    parser.add_argument("--no-cache", action="store_true", help="check every link, and remember nothing")
+    parser.add_argument("--report", default=REPORT_FILE, help="JSON report path")
+    args = parser.parse_args(argv)
+
+    outputs = args.outputs or default_outputs()
+    pages = page_ids(args.site) if os.path.exists(args.site) else {}
+    links = collect_links(outputs, args.base_url, pages)
+    cache = None if args.no_cache else LinkCache(args.cache, args.max_age_hours * 3600)
+
+    with LinkChecker(args.workers, args.per_host, args.timeout) as checker:
+        results, checked = check_links(links, checker, cache)
+    if cache is not None:
+        cache.save()
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(list(results.values()), f, indent=2)
+
+    broken = [result for result in results.values() if not result["ok"]]
+    for result in results.values():
+        if result["ok"] and result["redirects"]:
+            print(f"Redirected ({len(result['redirects'])}): {result['url']} -> {result['final_url']}")
+    for result in broken:
+        reason = result["error"] or f"{result['status']} ({result['method']})"
+        print(f"BROKEN {reason}: {result['url']}")
+        for source in result["sources"]:
+            print(f"  in {source}")
+    print(f"{len(results)} links in {len(outputs)} outputs: {checked} checked, "
+          f"{len(results) - checked} from cache, {len(broken)} broken. Report: {args.report}")
+    return 1 if broken else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
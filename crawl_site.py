@@ -0,0 +1,159 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+from fetch_pages import BASE_URL, Fetcher, write_snapshot
+from http_cache import CACHE_DIR, HttpCache
+from site_json import page_uris, page_uris_bytes
+from snapshot_store import SnapshotStore
+
+CRAWL_DIR = "snapshots"
+STATE_FILE = "crawl_state.json"
+RATE_LIMIT = 10
+
+
+def snapshot_name(uri):
+    """Stable file name for a page: temp_<uriPath>.html, so batch_extract
+    picks the directory up as is. A uriPath a file name cannot hold as is
+    ("consultoria/product") gets its other characters replaced and a short
+    hash of it appended, so "a/b" and "a_b" do not share a file."""
+    name = re.sub(r'[^A-Za-z0-9_-]+', '_', uri).strip('_')
+    if name != uri:
+        name = f"{name or 'index'}-{hashlib.sha256(uri.encode('utf-8')).hexdigest()[:8]}"
+    return "temp_" + name + ".html"
+
+
+def page_url(base_url, uri):
+    return base_url.rstrip("/") + "/" + uri.lstrip("/")
+
+
+class CrawlState:
+    """The crawl frontier, saved after every page so an interrupted crawl
+    resumes where it stopped.
+
+    `pending` is every uriPath not fetched yet; `done` maps fetched ones to
+    their snapshot; `failed` keeps the last error (failed pages are retried
+    on the next run).
+    """
+
+    def __init__(self, path, base_url, resume=True):
+        self.path = path
+        self.base_url = base_url
+        self.pending, self.done, self.failed = [], {}, {}
+        if not resume:
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("base_url") == base_url:
+            self.pending = data["pending"]
+            self.done = data["done"]
+            self.failed = data["failed"]
+
+    @property
+    def finished(self):
+        return bool(self.done) and not self.pending and not self.failed
+
+    def add(self, uris):
+        """Queue the uriPaths not seen yet; returns how many were new.
+        Pages without a uriPath are skipped."""
+        known = set(self.pending) | set(self.done)
+        new = [uri for uri in dict.fromkeys(uris) if uri and uri not in known]
+        self.pending.extend(new)
+        return len(new)
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"base_url": self.base_url, "pending": self.pending, "done": self.done,
+                       "failed": self.failed}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def crawl(seed=None, base_url=BASE_URL, out_dir=CRAWL_DIR, max_workers=8, rate_limit=RATE_LIMIT,
+          cache=None, restart=False, archive=None):
+    """Fetch every page listed in window._site into `out_dir`.
+
+    The frontier starts from `seed` (a snapshot file), or from the home
+    page when there is none, and takes in any page that a fetched snapshot
+    lists and the crawl has not seen. Returns the CrawlState.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    state = CrawlState(os.path.join(out_dir, STATE_FILE), base_url)
+    if restart or state.finished:
+        state = CrawlState(state.path, base_url, resume=False)
+
+    with Fetcher(max_workers=max_workers, cache=cache, rate_limit=rate_limit) as fetcher:
+        if not state.pending and not state.failed:
+            if seed:
+                state.add(page_uris(seed))
+            else:
+                resp = fetcher.get_ok(base_url.rstrip("/") + "/")
+                state.add(page_uris_bytes(resp.body))
+        state.pending.extend(uri for uri in state.failed if uri not in state.pending)
+        state.failed = {}
+        state.save()
+
+        # A round fetches the whole frontier; pages found along the way
+        # make up the next one.
+        while state.pending:
+            batch = list(state.pending)
+            urls = {page_url(base_url, uri): uri for uri in batch}
+            for url, result in fetcher.iter_fetch(urls):
+                uri = urls[url]
+                state.pending.remove(uri)
+                if isinstance(result, Exception):
+                    state.failed[uri] = str(result)
+                    print(f"Failed: {result}")
+                else:
+                    out_path = os.path.join(out_dir, snapshot_name(uri))
+                    if result.changed is False and os.path.exists(out_path):
+                        print(f"Unchanged ({result.status}): {url}")
+                    else:
+                        write_snapshot(out_path, result.body)
+                        print(f"{url} -> {out_path}")
+                    if cache is not None:
+                        cache.set_path(url, out_path)
+                    if archive is not None:
+                        archive.put(result.body, url=result.url, name=snapshot_name(uri))
+                    state.done[uri] = {"file": snapshot_name(uri), "url": result.url, "fetched_at": time.time()}
+                    new = state.add(page_uris_bytes(result.body))
+                    if new:
+                        print(f"  {new} new page(s) listed by {uri}")
+                state.save()
+
+    if cache is not None:
+        cache.evict()
+        cache.save()
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch every page of the site, as listed in window._site.pages.")
+    parser.add_argument("--seed", help="snapshot whose page list starts the crawl (default: fetch the home page)")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--out-dir", default=CRAWL_DIR)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="max requests per second per host")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved frontier")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-archive", action="store_true", help="do not keep the pages in the snapshot archive")
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else HttpCache(args.cache_dir)
+    started = time.perf_counter()
+    archive = None if args.no_archive else SnapshotStore()
+    state = crawl(args.seed, args.base_url, args.out_dir, args.workers, args.rate, cache, args.restart, archive)
+    print(f"{len(state.done)} pages in {time.perf_counter() - started:.1f}s, {len(state.failed)} failed. "
+          f"Snapshots in {args.out_dir}")
+    return 1 if state.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+"""One entry point for the scraping scripts.
+
+    python elance.py fetch [PAGE...]            fetch_pages.py
+    python elance.py crawl [...]                crawl_site.py
+    python elance.py extract TARGET [...]       the extract_*.py scripts
+    python elance.py inspect TOPIC [...]        structure, pages, diff, archive, stages, links
+    python elance.py watch [DIR]                re-extract snapshots as they change
+
+Each command imports only the module behind it, when it runs: the JSON
+extractors never load bs4, and listing the commands loads nothing but
+this file. bench_startup.py keeps it that way.
+"""
+import importlib
+import sys
+
+# (command, subcommand) -> ("module:function", help). The function gets the
+# rest of the command line, like the script's own main().
+MAINS = {
+    ("fetch",): ("fetch_pages:main", "fetch the builder pages into temp_*.html"),
+    ("crawl",): ("crawl_site:main", "fetch every page listed in window._site.pages"),
+    ("extract", "site"): ("extract_site:main", "every builder page in the snapshots"),
+    ("extract", "batch"): ("batch_extract:main", "every snapshot, in parallel, rebuilding what changed"),
+    ("extract", "downloads"): ("extract_downloads:main", "download links and text of the downloads page"),
+    ("inspect", "diff"): ("site_diff:main", "sections changed between two snapshots"),
+    ("inspect", "archive"): ("snapshot_store:main", "browse the compressed snapshot archive"),
+    ("inspect", "stages"): ("instrument:main", "run a script and report time and memory per stage"),
+    ("inspect", "links"): ("check_links:main", "check that the extracted download and button links answer"),
+    ("watch",): ("watch_snapshots:main", "re-extract the snapshots that change, keeping parses in memory"),
+}
+
+# (command, subcommand) -> ("module:function", default snapshot, options, help).
+# The function is called with one snapshot; `options` lists which of
+# --force and --backend it takes.
+SNAPSHOT_COMMANDS = {
+    ("extract", "mentoria"): ("extract_mentoria_json:extract_mentoria_data", "temp_mentoria.html",
+                              ("force",), "the Mentoria page"),
+    ("extract", "escola"): ("extract_escola_json:extract_escola_data", "temp_escola.html",
+                            ("force",), "the Escola page"),
+    ("extract", "ecossistema"): ("extract_ecossistema_json:extract_ecossistema_data", "temp_ecossistema.html",
+                                 ("force",), "the Ecossistema page"),
+    ("extract", "indique"): ("extract_indique_json:extract_indique_data", "temp_indique.html",
+                             ("force",), "the Indique page"),
+    ("extract", "curso-adv"): ("extract_curso_adv:extract_data", "temp_cursoadv.html",
+                               ("force", "backend"), "the sections of the lawyers' course page (HTML)"),
+    ("inspect", "structure"): ("inspect_curso_adv:inspect_html", "temp_cursoadv.html",
+                               ("backend",), "outline of a page's body"),
+    ("inspect", "pages"): ("elance:print_pages", "temp_mybid.html", (), "uriPath of every page in a snapshot"),
+}
+
+
+def resolve(target):
+    module, function = target.split(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def print_pages(file_path):
+    from site_json import page_uris
+
+    for uri in page_uris(file_path):
+        print(uri)
+
+
+def run_snapshot_command(name, argv):
+    import argparse
+
+    target, default, options, summary = SNAPSHOT_COMMANDS[name]
+    parser = argparse.ArgumentParser(prog="elance.py " + " ".join(name),
+                                     description=summary[0].upper() + summary[1:] + ".")
+    parser.add_argument("snapshot", nargs="?", default=default, help=f"default: {default}")
+    if "force" in options:
+        parser.add_argument("--force", action="store_true", help="rebuild even if the output is up to date")
+    if "backend" in options:
+        parser.add_argument("--backend", help="HTML parser: html.parser or lxml")
+    args = parser.parse_args(argv)
+    kwargs = {option: getattr(args, option) for option in options}
+    return resolve(target)(args.snapshot, **kwargs)
+
+
+def usage():
+    lines = [__doc__.strip().split("\n\n")[1], "", "commands:"]
+    commands = {name: spec[-1] for name, spec in SNAPSHOT_COMMANDS.items()}
+    commands.update((name, spec[1]) for name, spec in MAINS.items())
+    for name in sorted(commands):
+        lines.append(f"  {' '.join(name):<22}{commands[name]}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    for name in sorted(MAINS.keys() | SNAPSHOT_COMMANDS.keys(), key=len, reverse=True):
+        if tuple(argv[:len(name)]) != name:
+            continue
+        rest = argv[len(name):]
+        if name in MAINS:
+            # The scripts' parsers take their usage line from argv[0].
+            sys.argv[0] = "elance.py " + " ".join(name)
+            status = resolve(MAINS[name][0])(rest)
+        else:
+            status = run_snapshot_command(name, rest)
+        return status if isinstance(status, int) else 0
+
+    print(usage())
+    return 0 if argv[:1] in ([], ["-h"], ["--help"]) else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
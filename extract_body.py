@@ -1,11 +1,11 @@
 
-from bs4 import BeautifulSoup
+from html_backend import make_soup
 
 try:
     with open('temp_mybid.html', 'r', encoding='utf-8') as f:
         html_content = f.read()
 
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content, only=['body'])
     body = soup.body
 
     if body:
@@ -1,88 +1,127 @@
 import json
-from bs4 import BeautifulSoup
 
-def extract_data(file_path):
-    soup = None
-    # PowerShell might have saved as UTF-16 LE if not specified, or Windows-1252.
-    # Let's try likely encodings.
-    encodings = ['utf-8', 'latin-1', 'cp1252', 'utf-16']
-    
-    for enc in encodings:
-        try:
-            with open(file_path, 'r', encoding=enc) as f:
-                html_content = f.read()
-            soup = BeautifulSoup(html_content, 'html.parser')
-            if soup.body:
-                break
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-    
-    if not soup or not soup.body:
-        print("Could not parse file with standard encodings.")
-        return
+import html_backend
+import html_charset
+import records
+from extract_manifest import Manifest, extractor_version
+from html_backend import make_soup
+from html_charset import decode_html
+from instrument import stage
+from records import Link, Page, Section
+from snapshot_store import read_bytes
 
-    sections = []
+OUTPUT_FILE = 'curso_adv_data.json'
+
+HEADER_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5'}
+
+def find_sections(soup):
     # Find the div that contains sections
     for child in soup.body.children:
         if child.name == 'div':
             found_sections = child.find_all('section', recursive=False)
             if len(found_sections) > 0:
-                sections = found_sections
-                break
-    
-    if not sections:
-        # Fallback: just find all sections in body
-        sections = soup.body.find_all('section')
+                return found_sections
+
+    # Fallback: just find all sections in body
+    return soup.body.find_all('section')
+
+def visit_section(section):
+    """Collect headers, paragraphs, images, buttons and list items in a
+    single walk over the section, computing each node's text once."""
+    headers, paragraphs, images, buttons, list_items = [], [], [], [], []
+
+    for node in section.descendants:
+        name = node.name
+        if name is None:
+            continue
+        if name in HEADER_TAGS:
+            headers.append(node.get_text(strip=True))
+        elif name == 'p':
+            text = node.get_text(strip=True)
+            if text:
+                paragraphs.append(text)
+        elif name == 'img':
+            # Get images with absolute or relative paths
+            src = node.get('src') or node.get('data-src')
+            if src:
+                images.append(src)
+        elif name == 'a':
+            text = node.get_text(strip=True)
+            href = node.get('href')
+            if text and href:
+                buttons.append(Link(href=href, text=text))
+        elif name == 'li':
+            # List items for modules/benefits
+            list_items.append(node.get_text(strip=True))
+
+    return headers, paragraphs, images, buttons, list_items
 
+def extract_sections(soup):
     extracted_sections = []
 
-    for i, section in enumerate(sections):
+    for i, section in enumerate(find_sections(soup)):
         # Skip navbar (usually first section or has navigation class)
         classes = section.get('class', [])
         if i == 0 and ('navigation' in str(classes) or 'nav' in str(classes)):
             continue
 
-        headers = [h.get_text(strip=True) for h in section.find_all(['h1', 'h2', 'h3', 'h4', 'h5'])]
-        paragraphs = [p.get_text(strip=True) for p in section.find_all('p') if p.get_text(strip=True)]
-        
-        # Get images with absolute or relative paths
-        images = []
-        for img in section.find_all('img'):
-            src = img.get('src') or img.get('data-src')
-            if src:
-                images.append(src)
+        headers, paragraphs, images, buttons, list_items = visit_section(section)
 
-        buttons = []
-        for a in section.find_all('a'):
-            text = a.get_text(strip=True)
-            href = a.get('href')
-            if text and href:
-                buttons.append({"text": text, "href": href})
-
-        # List items for modules/benefits
-        list_items = [li.get_text(strip=True) for li in section.find_all('li')]
-
-        sec_data = {
-            "id": f"section-{i}",
-            "classes": classes,
-            "headers": headers,
-            "paragraphs": paragraphs,
-            "images": images,
-            "buttons": buttons,
-            "list_items": list_items
-        }
-        
-        extracted_sections.append(sec_data)
-
-    output_data = {
-        "page_title": soup.title.string if soup.title else "Curso Advogados",
-        "sections": extracted_sections
-    }
-
-    with open('curso_adv_data.json', 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+        extracted_sections.append(Section(
+            id=f"section-{i}",
+            classes=classes,
+            headers=headers,
+            paragraphs=paragraphs,
+            images=images,
+            buttons=buttons,
+            list_items=list_items,
+        ))
+
+    return extracted_sections
+
+def parse_snapshot(raw, backend=None):
+    """(soup, encoding) of a snapshot's bytes."""
+    # Sniff the encoding from the bytes (BOM, <meta charset>, UTF-8
+    # validity) so the file is decoded and parsed exactly once.
+    html_content, encoding, _ = decode_html(raw)
+    # Only <title> and <body> are read below; skip building the rest.
+    return make_soup(html_content, backend, only=['title', 'body']), encoding
+
+def build_page(soup, encoding):
+    with stage('section_walk'):
+        extracted_sections = extract_sections(soup)
+
+    return Page(
+        title=soup.title.string if soup.title else "Curso Advogados",
+        encoding=encoding,
+        sections=extracted_sections,
+    )
+
+def render_json(page):
+    return json.dumps(page.to_dict(), indent=2, ensure_ascii=False)
+
+def extract_data(file_path, force=False, backend=None):
+    manifest = Manifest()
+    version = extractor_version(__file__, html_charset.__file__, html_backend.__file__, records.__file__)
+    if not force and manifest.is_fresh(OUTPUT_FILE, [file_path], version):
+        print(f"{OUTPUT_FILE} is up to date.")
+        return
+
+    soup, encoding = parse_snapshot(read_bytes(file_path), backend)
+    if not soup.body:
+        print(f"Could not find <body> (decoded as {encoding}).")
+        return
+
+    page = build_page(soup, encoding)
+
+    with stage('write') as st:
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            f.write(render_json(page))
+        st.output(OUTPUT_FILE)
+    manifest.record(OUTPUT_FILE, [file_path], version)
+    manifest.save()
     
-    print(f"Extracted {len(extracted_sections)} sections to curso_adv_data.json")
+    print(f"Extracted {len(page.sections)} sections to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
     extract_data('temp_cursoadv.html')
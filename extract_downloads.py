@@ -1,72 +1,176 @@
 
+import argparse
+import io
 import json
 from html.parser import HTMLParser
 
+import boilerplate
+import link_classifier
+import records
+from boilerplate import is_boilerplate
+from extract_manifest import Manifest, extractor_version
+from instrument import stage
+from link_classifier import classify_link
+from records import Image, Link, TextElement, to_json
+from snapshot_store import open_binary
+
+CHUNK_SIZE = 64 * 1024
+OUTPUT_FILE = 'downloads_data.json'
+
 class MyHTMLParser(HTMLParser):
-    def __init__(self):
+    """Collects links, images and text elements (records.Link, Image and
+    TextElement).
+
+    Text is attached to the most recently opened element, so an element is
+    complete as soon as the next one opens (or the document ends). At that
+    point it is handed to `on_element`, or kept in `self.data` when no
+    callback is given.
+    """
+
+    def __init__(self, on_element=None):
         super().__init__()
         self.data = []
-        self.current_tag = None
-        self.current_attrs = {}
+        self.on_element = on_element or self.data.append
+        self.current = None
+        self.text_parts = None
+
+    def _finish_current(self):
+        item = self.current
+        if item is None:
+            return
+        if self.text_parts is not None:
+            item.text = ''.join(part + " " for part in self.text_parts)
+        self.current = None
+        self.text_parts = None
+        self.on_element(item)
 
     def handle_starttag(self, tag, attrs):
-        self.current_tag = tag
-        attr_dict = dict(attrs)
-        
         if tag == 'a':
-            self.data.append({
-                'type': 'link',
-                'href': attr_dict.get('href'),
-                'text': '',
-                'title': attr_dict.get('title'),
-                'class': attr_dict.get('class')
-            })
+            attr_dict = dict(attrs)
+            item = Link(attr_dict.get('href'), '', attr_dict.get('title'), attr_dict.get('class'))
         elif tag == 'img':
-            self.data.append({
-                'type': 'image',
-                'src': attr_dict.get('src'),
-                'alt': attr_dict.get('alt'),
-                'class': attr_dict.get('class')
-            })
-        elif tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'div']:
-             self.data.append({
-                'type': 'text_element',
-                'tag': tag,
-                'text': '',
-                'class': attr_dict.get('class')
-            })
-            
+            attr_dict = dict(attrs)
+            item = Image(attr_dict.get('src'), attr_dict.get('alt'), attr_dict.get('class'))
+        elif tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'div'):
+            item = TextElement(tag, '', dict(attrs).get('class'))
+        else:
+            return
+
+        self._finish_current()
+        self.current = item
+        self.text_parts = None if tag == 'img' else []
+
     def handle_data(self, data):
-        if data.strip():
-            # Attach text to the last element if it's currently open or just added
-            if self.data:
-                last = self.data[-1]
-                if 'text' in last:
-                    last['text'] += data.strip() + " "
+        # Attach text to the last element if it takes text
+        if self.text_parts is not None:
+            data = data.strip()
+            if data:
+                self.text_parts.append(data)
+
+    def close(self):
+        super().close()
+        self._finish_current()
+
+class DownloadFilter:
+    """Keeps download links (tagged with their category, each href once)
+    and significant text that is not builder placeholder."""
+
+    def __init__(self):
+        self.seen_hrefs = set()
+
+    def __call__(self, item):
+        if type(item) is Link:
+            href = item.href
+            category = classify_link(href)
+            if category is None or href in self.seen_hrefs:
+                return False
+            self.seen_hrefs.add(href)
+            item.category = category
+            return True
+        # Keep significant text, not builder placeholders
+        return type(item) is TextElement and len(item.text) > 5 and not is_boilerplate(item.text)
+
+def feed_file(parser, file_path, chunk_size=CHUNK_SIZE):
+    """Feed `file_path` to `parser` in chunks of about `chunk_size`.
+
+    Each chunk is cut just before a '<'. HTMLParser passes text at the end
+    of its buffer on straight away, so cutting inside a text node would split
+    it into two handle_data calls (stripped separately). Text always ends at
+    a '<', so this keeps the calls the same as feeding the whole file.
+    """
+    carry = ''
+    with stage('parse') as st, io.TextIOWrapper(open_binary(file_path), encoding='utf-8') as f:
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            st.bytes_in += len(chunk)
+            buf = carry + chunk
+            cut = buf.rfind('<')
+            if cut <= 0:
+                carry = buf
+                continue
+            parser.feed(buf[:cut])
+            carry = buf[cut:]
+        parser.feed(carry)
+        parser.close()
+
+def stream_downloads(file_path, output_file, chunk_size=CHUNK_SIZE):
+    """Write the download items of `file_path` as JSON Lines while parsing.
+
+    Memory stays bounded by the chunk size and the largest single element,
+    whatever the size of the page.
+    """
+    count = 0
+    keep = DownloadFilter()
+    with open(output_file, 'w', encoding='utf-8') as out:
+        def on_element(item):
+            nonlocal count
+            if keep(item):
+                out.write(to_json(item) + "\n")
+                count += 1
 
-parser = MyHTMLParser()
+        feed_file(MyHTMLParser(on_element), file_path, chunk_size)
+    return count
 
-with open('temp_downloads.html', 'r', encoding='utf-8') as f:
-    content = f.read()
+def render_downloads(file_path):
+    """(item count, downloads_data.json text) for the download items of
+    `file_path`."""
+    parser = MyHTMLParser()
+    feed_file(parser, file_path)
 
-parser.feed(content)
+    # Filter for likely download items
+    keep = DownloadFilter()
+    items = [item.to_dict() for item in parser.data if keep(item)]
+    return len(items), json.dumps(items, indent=2)
 
-# Filter for likely download items
-import re
-filtered_data = []
+def extract_downloads(file_path, output_file=OUTPUT_FILE, force=False, stream=False):
+    manifest = Manifest()
+    version = extractor_version(__file__, boilerplate.__file__, link_classifier.__file__, records.__file__)
+    if not force and manifest.is_fresh(output_file, [file_path], version):
+        print(f"{output_file} is up to date.")
+        return
 
-for item in parser.data:
-    if item['type'] == 'link' and item['href']:
-        # links usually contain http/https and maybe "download" or "drive" or "dropbox" or file extensions
-        if any(x in item['href'] for x in ['drive.google', 'dropbox', '.pdf', '.doc', '.zip', 'download', 'bit.ly', 'mybid.com.br']):
-            filtered_data.append(item)
-    elif item['type'] == 'text_element' and len(item.get('text', '')) > 5:
-        # Keep significant text
-        filtered_data.append(item)
+    if stream:
+        count = stream_downloads(file_path, output_file)
+    else:
+        count, text = render_downloads(file_path)
+        with stage('write') as st:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+            st.output(output_file)
+    manifest.record(output_file, [file_path], version)
+    manifest.save()
 
+    print(f"Extraction complete. {count} items saved to {output_file}")
 
-with open('downloads_data.json', 'w', encoding='utf-8') as f:
-    json.dump(filtered_data, f, indent=2)
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Extract download links and text from the downloads page.")
+    arg_parser.add_argument("input", nargs="?", default="temp_downloads.html")
+    arg_parser.add_argument("--stream", action="store_true", help="write JSON Lines while parsing")
+    arg_parser.add_argument("--output", help="default: downloads_data.json, or downloads_data.jsonl with --stream")
+    arg_parser.add_argument("--force", action="store_true")
+    args = arg_parser.parse_args(argv)
 
-print("Extraction complete. Data saved to downloads_data.json")
+    output = args.output or ('downloads_data.jsonl' if args.stream else OUTPUT_FILE)
+    extract_downloads(args.input, output, args.force, args.stream)
 
+if __name__ == "__main__":
+    main()
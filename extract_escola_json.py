@@ -1,61 +1,42 @@
-import re
-import json
+import site_json
+import site_model
+import site_records
+from extract_manifest import Manifest, extractor_version
+from instrument import stage
+from site_model import load_site_model
+from site_records import page_record
 
-def extract_escola_data(file_path):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+TARGET_URI = "escola-de-formagco-para-novos-leiloeiros"
+OUTPUT_FILE = "escola_data.txt"
 
-    # Find the JSON object assigned to window._site
-    match = re.search(r'window\._site\s*=\s*(\{.*?\});', content, re.DOTALL)
-    if not match:
-        print("Could not find window._site JSON")
+def extract_escola_data(file_path, force=False):
+    manifest = Manifest()
+    version = extractor_version(__file__, site_json.__file__, site_model.__file__, *site_records.SOURCES)
+    if not force and manifest.is_fresh(OUTPUT_FILE, [file_path], version):
+        print(f"{OUTPUT_FILE} is up to date.")
         return
 
-    json_str = match.group(1)
     try:
-        data = json.loads(json_str)
-    except json.JSONDecodeError as e:
+        model = load_site_model(file_path, [TARGET_URI])
+    except ValueError as e:
         print(f"Error parsing JSON: {e}")
         return
+    if model is None:
+        print("Could not find window._site JSON")
+        return
 
-    # Find the specific page
-    target_uri = "escola-de-formagco-para-novos-leiloeiros"
-    page_data = None
-    for page in data.get('pages', []):
-        if page.get('uriPath') == target_uri:
-            page_data = page
-            break
-    
+    page_data = model.page(TARGET_URI)
     if not page_data:
-        print(f"Page with uriPath '{target_uri}' not found.")
+        print(f"Page with uriPath '{TARGET_URI}' not found.")
         return
 
-    with open("escola_data.txt", "w", encoding="utf-8") as out:
-        out.write(f"Page Title: {page_data.get('title')}\n")
-        out.write("-" * 20 + "\n")
-
-        for section in page_data.get('sections', []):
-            binding = section.get('binding', {})
-            category = section.get('category')
-            
-            out.write(f"Category: {category}\n")
-            out.write(f"Title: {binding.get('title')}\n")
-            out.write(f"Subtitle: {binding.get('subtitle')}\n")
-            out.write(f"Description: {binding.get('description')}\n")
-            
-            # Images
-            if 'image' in binding:
-                 out.write(f"Image: {binding['image'].get('value')}\n")
-            
-            # Lists (simple)
-            if 'list' in binding:
-                out.write("List Items:\n")
-                for item in binding['list']:
-                    out.write(f"  - Title: {item.get('title')}\n")
-                    out.write(f"    Description: {item.get('description')}\n")
-                    out.write(f"    Price: {item.get('price')}\n")
-            
-            out.write("=" * 20 + "\n")
+    page = page_record(page_data)
+    with stage("write") as st:
+        with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
+            page.write_text(out)
+        st.output(OUTPUT_FILE)
+    manifest.record(OUTPUT_FILE, [file_path], version)
+    manifest.save()
 
 if __name__ == "__main__":
     extract_escola_data("temp_escola.html")
@@ -1,78 +1,55 @@
-import re
 import json
 
-def extract_indique_data(file_path):
+import site_json
+import site_model
+import site_records
+from extract_manifest import Manifest, extractor_version
+from instrument import debug, stage
+from site_model import load_site_model
+from site_records import page_record
+
+TARGET_URI = "indique-a-e-lance-para-realizar-o-seu-leilao"
+OUTPUT_FILE = "indique_data.txt"
+
+DEBUG_FILE = "indique_debug.txt"
+
+def write_indique_debug(page_data):
+    # Debug: dump binding keys
+    for section in page_data.get('sections', []):
+        binding = section.get('binding', {})
+        debug.write(DEBUG_FILE, f"Category: {section.get('category')}\n")
+        if 'form' in binding:
+            debug.write(DEBUG_FILE, "Form found inside binding.\n")
+        debug.write(DEBUG_FILE, json.dumps(binding, indent=2))
+        debug.write(DEBUG_FILE, "\n" + "="*20 + "\n")
+
+def extract_indique_data(file_path, force=False):
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        manifest = Manifest()
+        version = extractor_version(__file__, site_json.__file__, site_model.__file__, *site_records.SOURCES)
+        if not force and manifest.is_fresh(OUTPUT_FILE, [file_path], version):
+            print(f"{OUTPUT_FILE} is up to date.")
+            return
 
-        # Find the start of the JSON object
-        start_marker = 'window._site='
-        start_index = content.find(start_marker)
-        
-        if start_index == -1:
+        model = load_site_model(file_path, [TARGET_URI])
+        if model is None:
             print("Could not find window._site=")
             return
-        
-        json_start = start_index + len(start_marker)
-        potential_json = content[json_start:]
-        
-        decoder = json.JSONDecoder()
-        try:
-             driver_data, idx = decoder.raw_decode(potential_json)
-             data = driver_data
-        except json.JSONDecodeError as e:
-            print(f"JSON Decode Error with raw_decode: {e}")
-            end_index = potential_json.rfind('};')
-            if end_index != -1:
-                 clean_json = potential_json[:end_index+1]
-                 try:
-                    data = json.loads(clean_json)
-                 except:
-                    print("Fallback parsing failed.")
-                    return
-            else:
-                return
-
-        target_uri = "indique-a-e-lance-para-realizar-o-seu-leilao"
-        page_data = None
-        for page in data.get('pages', []):
-            if page.get('uriPath') == target_uri:
-                page_data = page
-                break
 
+        page_data = model.page(TARGET_URI)
         if not page_data:
-            print(f"Page with uriPath '{target_uri}' not found.")
+            print(f"Page with uriPath '{TARGET_URI}' not found.")
             return
 
-        with open("indique_data.txt", "w", encoding="utf-8") as out:
-            out.write(f"Page Title: {page_data.get('title')}\n")
-            out.write("-" * 20 + "\n")
-
-            if 'sections' in page_data:
-                for section in page_data['sections']:
-                    binding = section.get('binding', {})
-                    category = section.get('category')
-                    
-                    out.write(f"Category: {category}\n")
-                    
-                    title = binding.get('title') or binding.get('heading')
-                    subtitle = binding.get('subtitle') or binding.get('subHeading')
-                    description = binding.get('description') or binding.get('text')
-                    
-                    if title: out.write(f"Title: {title}\n")
-                    if subtitle: out.write(f"Subtitle: {subtitle}\n")
-                    if description: out.write(f"Description: {description}\n")
-
-                    if 'form' in binding:
-                         out.write("Form found inside binding.\n")
-
-                    # Debug: dump binding keys
-                    out.write("Debug Binding:\n")
-                    out.write(json.dumps(binding, indent=2))
-                    out.write("\n" + "="*20 + "\n")
-            else:
-                 print("No sections found in page data.")
+        page = page_record(page_data)
+        with stage("write") as st:
+            with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
+                page.write_text(out)
+            st.output(OUTPUT_FILE)
+        write_indique_debug(page_data)
+        debug.flush()
+        manifest.record(OUTPUT_FILE, [file_path], version)
+        manifest.save()
 
         print("Extraction complete. Check indique_data.txt")
 
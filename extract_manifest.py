@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = ".extract_manifest.json"
+
+
+def extractor_version(*source_files):
+    """Hash of the extractor's source files; any edit to them invalidates
+    the outputs they produced."""
+    h = hashlib.sha256()
+    for source in source_files:
+        with open(source, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class Manifest:
+    """Records, per output file, the hashes of its inputs, the extractor
+    version and its own hash, so unchanged outputs are not rebuilt.
+
+    File hashes are cached against (size, mtime_ns) so a run where nothing
+    changed only stats the files instead of rereading them.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.data = self._load()
+        self._touched = set()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        for section in ("files", "outputs", "snapshots"):
+            data.setdefault(section, {})
+        return data
+
+    def _set(self, section, key, value):
+        self.data[section][key] = value
+        self._touched.add((section, key))
+
+    def digest(self, path):
+        """sha256 of `path`, or None when it does not exist."""
+        if path.startswith("archive:"):
+            from snapshot_store import ref_digest
+
+            return ref_digest(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        cached = self.data["files"].get(path)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["sha256"]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        self._set("files", path, {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()})
+        return h.hexdigest()
+
+    def is_fresh(self, output, inputs, version):
+        entry = self.data["outputs"].get(output)
+        if not entry or entry["extractor"] != version:
+            return False
+        if entry["inputs"] != {path: self.digest(path) for path in inputs}:
+            return False
+        return self.digest(output) == entry["sha256"]
+
+    def record(self, output, inputs, version, **extra):
+        self._set("outputs", output, dict(
+            extra,
+            inputs={path: self.digest(path) for path in inputs},
+            extractor=version,
+            sha256=self.digest(output),
+        ))
+
+    def snapshot_result(self, snapshot, version):
+        """What `version` extracted from `snapshot` last time, if the
+        snapshot has not changed since."""
+        entry = self.data["snapshots"].get(snapshot)
+        if entry and entry["extractor"] == version and entry["sha256"] == self.digest(snapshot):
+            return entry["result"]
+        return None
+
+    def record_snapshot(self, snapshot, version, result):
+        self._set("snapshots", snapshot, {"sha256": self.digest(snapshot), "extractor": version, "result": result})
+
+    def save(self):
+        # Merge into whatever is on disk now, so extractors run side by side
+        # do not drop each other's entries.
+        current = self._load()
+        for section, key in self._touched:
+            current[section][key] = self.data[section][key]
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+        self.data = current
+        self._touched.clear()
@@ -0,0 +1,72 @@
+import argparse
+import glob
+import io
+import os
+import re
+
+from instrument import stage
+from site_model import load_site_models
+from site_records import page_record
+
+# uriPath -> output file. Other pages go to site_pages/<uriPath>_data.txt,
+# so a new builder page needs no new script and its output stays apart
+# from the checked-in ones; every page is written in the same layout
+# (records.Page.write_text).
+PAGE_OUTPUTS = {
+    "escola-de-formagco-para-novos-leiloeiros": "escola_data.txt",
+    "mentoria-trilha-do-arrematante": "mentoria_data.txt",
+    "o-ecossistema-e-lance-e-my-bid": "ecossistema_data.txt",
+    "indique-a-e-lance-para-realizar-o-seu-leilao": "indique_data.txt",
+}
+OTHER_PAGES_DIR = "site_pages"
+
+
+def output_name(uri):
+    """Output path of page `uri`, relative to the output directory."""
+    if uri in PAGE_OUTPUTS:
+        return PAGE_OUTPUTS[uri]
+    return os.path.join(OTHER_PAGES_DIR, re.sub(r'[^A-Za-z0-9_-]+', '_', uri).strip('_') + "_data.txt")
+
+
+def render_page(page_data):
+    """(output file name, text) for a page."""
+    out = io.StringIO()
+    page_record(page_data).write_text(out)
+    return output_name(page_data.get('uriPath')), out.getvalue()
+
+
+def extract_site(file_paths, out_dir="."):
+    """Write every page that has sections in any of `file_paths`.
+
+    Each snapshot is decoded once, whatever the number of pages.
+    """
+    model = load_site_models(file_paths)
+    if model is None:
+        print("Could not find window._site in any snapshot")
+        return []
+
+    written = []
+    for page in model.pages_with_sections():
+        file_name, text = render_page(page)
+        out_path = os.path.join(out_dir, file_name)
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        with stage("write") as st:
+            with open(out_path, "w", encoding="utf-8") as out:
+                out.write(text)
+            st.output(out_path)
+        written.append(out_path)
+        print(f"{page.get('uriPath')} -> {out_path}")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract every builder page found in the snapshots.")
+    parser.add_argument("snapshots", nargs="*", help="snapshot files (default: temp_*.html)")
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args(argv)
+
+    extract_site(args.snapshots or sorted(glob.glob("temp_*.html")), args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import argparse
+import gzip
+import http.client
+import os
+import threading
+import time
+import urllib.parse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from http_cache import CACHE_DIR, HttpCache, sha256
+from instrument import stage
+from snapshot_store import SnapshotStore
+
+BASE_URL = "https://mybid.com.br"
+
+headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Encoding": "gzip",
+}
+
+# page name -> (snapshot file, candidate paths). All candidates of a page are
+# requested at the same time; the earliest-listed one that answers 200 is kept.
+PAGES = {
+    "escola": ("temp_escola.html", [
+        "/escola-de-formagco-para-novos-leiloeiros",
+        "/escola-de-formacao-para-novos-leiloeiros",
+        "/escola-de-formacao-de-leiloeiros",
+    ]),
+    "mentoria": ("temp_mentoria.html", ["/mentoria-trilha-do-arrematante"]),
+    "ecossistema": ("temp_ecossistema.html", ["/o-ecossistema-e-lance-e-my-bid"]),
+    "indique": ("temp_indique.html", ["/indique-a-e-lance-para-realizar-o-seu-leilao"]),
+}
+
+MAX_REDIRECTS = 5
+
+# `changed` is False when the cache proved the body identical to the last
+# fetch (304 or same hash), True when it differs, None when uncached.
+Response = namedtuple("Response", ["url", "status", "headers", "body", "request_url", "changed"],
+                      defaults=(None, None))
+
+
+class FetchError(Exception):
+    def __init__(self, url, status=None, reason=""):
+        self.url = url
+        self.status = status
+        super().__init__(f"{url}: {status or ''} {reason}".strip())
+
+
+class ConnectionPool:
+    """Idle keep-alive connections, kept per (scheme, host, port)."""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, scheme, netloc):
+        key = (scheme, netloc)
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return conns.pop(), True
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout), False
+        return http.client.HTTPConnection(netloc, timeout=self.timeout), False
+
+    def release(self, scheme, netloc, conn):
+        with self._lock:
+            self._idle.setdefault((scheme, netloc), []).append(conn)
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host to at most `rate` per second;
+    different hosts do not wait for each other."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class Fetcher:
+    def __init__(self, max_workers=8, timeout=30, extra_headers=None, cache=None, rate_limit=None):
+        self.max_workers = max_workers
+        self.cache = cache
+        self.limiter = HostRateLimiter(rate_limit) if rate_limit else None
+        self.pool = ConnectionPool(timeout)
+        self.headers = dict(headers)
+        if extra_headers:
+            self.headers.update(extra_headers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    def _request(self, url, req_headers):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        if self.limiter is not None:
+            self.limiter.wait(parts.netloc)
+
+        with stage("fetch") as st:
+            # A reused connection may have been closed by the server while
+            # idle; retry once on a fresh one in that case.
+            for attempt in range(2):
+                conn, reused = self.pool.acquire(parts.scheme, parts.netloc)
+                try:
+                    conn.request("GET", path, headers=req_headers)
+                    resp = conn.getresponse()
+                    body = resp.read()
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    conn.close()
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except Exception:
+                    conn.close()
+                    raise
+
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self.pool.release(parts.scheme, parts.netloc, conn)
+
+                st.bytes_in = len(body)
+                if resp.getheader("Content-Encoding", "").lower() == "gzip":
+                    body = gzip.decompress(body)
+                st.bytes_out = len(body)
+                return resp.status, {k.lower(): v for k, v in resp.getheaders()}, body
+
+    def get(self, url, extra_headers=None):
+        req_headers = dict(self.headers)
+        if extra_headers:
+            req_headers.update(extra_headers)
+
+        request_url = url
+        for _ in range(MAX_REDIRECTS + 1):
+            status, resp_headers, body = self._request(url, req_headers)
+            if status in (301, 302, 303, 307, 308) and "location" in resp_headers:
+                url = urllib.parse.urljoin(url, resp_headers["location"])
+                continue
+            return Response(url, status, resp_headers, body, request_url)
+        raise FetchError(url, reason="too many redirects")
+
+    def get_ok(self, url, extra_headers=None, ok=(200,)):
+        cache = self.cache
+        if cache is not None:
+            extra_headers = dict(cache.conditional_headers(url), **(extra_headers or {}))
+
+        resp = self.get(url, extra_headers)
+        if cache is not None and resp.status == 304 and cache.entry(url):
+            cache.not_modified(url)
+            return resp._replace(body=cache.body(url), changed=False)
+        if resp.status not in ok:
+            raise FetchError(url, resp.status, "unexpected status")
+        if cache is not None:
+            _, changed = cache.store(url, resp.headers, resp.body)
+            resp = resp._replace(changed=changed)
+        return resp
+
+    def iter_fetch(self, urls):
+        """Fetch every URL concurrently, yielding (url, Response or
+        exception) as each one completes."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.get_ok, url): url for url in urls}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        yield futures[future], future.result()
+                    except Exception as e:
+                        yield futures[future], e
+            finally:
+                # Stopped early (e.g. Ctrl-C): do not start what is queued.
+                for future in futures:
+                    future.cancel()
+
+    def fetch_all(self, urls):
+        """Fetch every URL concurrently. Returns url -> Response or exception."""
+        return dict(self.iter_fetch(urls))
+
+    def fetch_first(self, pages):
+        """Race all candidate URLs of every page in one batch.
+
+        `pages` maps a name to a list of candidate URLs, most preferred
+        first. Returns name -> Response of the earliest-listed candidate
+        that succeeded, whichever answered first, so a page comes from the
+        same URL on every run; or the list of errors when none did.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {name: [executor.submit(self.get_ok, url) for url in urls] for name, urls in pages.items()}
+
+        results = {}
+        for name, candidates in futures.items():
+            errors = []
+            for future in candidates:
+                try:
+                    results[name] = future.result()
+                    break
+                except Exception as e:
+                    errors.append(e)
+            else:
+                results[name] = errors
+        return results
+
+
+def page_candidates(names, base_url=BASE_URL):
+    base_url = base_url.rstrip("/")
+    return {name: [base_url + path for path in PAGES[name][1]] for name in names}
+
+
+def file_digest(path):
+    """sha256 of the file at `path`, or None when there is none."""
+    try:
+        with open(path, "rb") as f:
+            return sha256(f.read())
+    except OSError:
+        return None
+
+
+def write_snapshot(path, body):
+    with stage("write", len(body)) as st:
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+        st.bytes_out = len(body)
+
+
+def refresh(names=None, base_url=BASE_URL, out_dir=".", max_workers=8, cache=None, archive=None):
+    names = list(names or PAGES)
+    with Fetcher(max_workers=max_workers, cache=cache) as fetcher:
+        results = fetcher.fetch_first(page_candidates(names, base_url))
+
+    failed = []
+    for name in names:
+        result = results[name]
+        if isinstance(result, Response):
+            out_path = os.path.join(out_dir, PAGES[name][0])
+            # Compared with the file, not the cache: the winning candidate
+            # may not be the one the snapshot was last written from.
+            if file_digest(out_path) == sha256(result.body):
+                print(f"Unchanged ({result.status}): {result.url}, keeping {out_path}")
+            else:
+                print(f"Success! {result.url} -> {out_path}")
+                write_snapshot(out_path, result.body)
+            if cache is not None:
+                cache.set_path(result.request_url, out_path)
+            if archive is not None:
+                archive.put(result.body, url=result.url, name=PAGES[name][0])
+        else:
+            failed.append(name)
+            for e in result:
+                print(f"Failed: {e}")
+
+    if cache is not None:
+        cache.evict()
+        cache.save()
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the temp_*.html page snapshots.")
+    parser.add_argument("pages", nargs="*", help="pages to fetch: %s (default: all)" % ", ".join(PAGES))
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="always download and rewrite every snapshot")
+    parser.add_argument("--cache-max-mb", type=float, default=64)
+    parser.add_argument("--cache-max-age-days", type=float, default=30)
+    parser.add_argument("--no-archive", action="store_true", help="do not keep this version in the snapshot archive")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.pages if name not in PAGES]
+    if unknown:
+        parser.error("unknown page(s): " + ", ".join(unknown))
+
+    cache = None
+    if not args.no_cache:
+        cache = HttpCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024),
+                          args.cache_max_age_days * 24 * 3600)
+    archive = None if args.no_archive else SnapshotStore()
+    failed = refresh(args.pages, args.base_url, args.out_dir, args.workers, cache, archive)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
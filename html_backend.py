@@ -0,0 +1,37 @@
+import os
+
+from instrument import stage
+
+# Parser used by the BeautifulSoup-based scripts. 'html.parser' is pure
+# Python; 'lxml' is libxml2's C parser.
+BACKENDS = ('html.parser', 'lxml')
+DEFAULT_BACKEND = os.environ.get('ELANCE_HTML_BACKEND', 'html.parser')
+
+
+def available_backends():
+    found = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        found.append('lxml')
+    except ImportError:
+        pass
+    return found
+
+
+def make_soup(html, backend=None, only=None):
+    """Parse `html` with the configured backend.
+
+    `only` is a list of tag names; when given, just those elements (and
+    their subtrees) are built, SoupStrainer-style, instead of the whole
+    document.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+    # bs4 is imported here, not at the top, so that importing a script
+    # that may parse HTML does not cost the bs4 import until it does.
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    with stage('parse', len(html)):
+        return BeautifulSoup(html, backend, parse_only=SoupStrainer(only) if only else None)
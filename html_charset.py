@@ -0,0 +1,66 @@
+import codecs
+import re
+
+# Longest BOMs first: the UTF-32 LE BOM starts with the UTF-16 LE one.
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+SNIFF_BYTES = 4096
+
+# Matches both <meta charset="..."> and
+# <meta http-equiv="Content-Type" content="text/html; charset=...">.
+META_CHARSET = re.compile(rb'<meta\b[^>]*?charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.I)
+
+
+def sniff_encoding(raw):
+    """Guess the encoding of an HTML document from its bytes.
+
+    Returns (encoding, how) where `how` is 'bom', 'meta', 'utf-16-nul',
+    'utf-8' (valid UTF-8 without any declaration) or 'fallback'.
+    """
+    for bom, encoding in BOMS:
+        if raw.startswith(bom):
+            return encoding, 'bom'
+
+    head = raw[:SNIFF_BYTES]
+    # UTF-16 without a BOM (e.g. PowerShell redirection): ASCII markup
+    # leaves every other byte NUL.
+    if head[1::2].count(0) > len(head) // 4:
+        return 'utf-16-le', 'utf-16-nul'
+    if head[0::2].count(0) > len(head) // 4:
+        return 'utf-16-be', 'utf-16-nul'
+
+    match = META_CHARSET.search(head)
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode('ascii')).name, 'meta'
+        except LookupError:
+            pass
+
+    return None, None
+
+
+def decode_html(raw):
+    """Decode HTML bytes exactly once.
+
+    Returns (text, encoding, how). Without a BOM or declaration the bytes
+    are tried as UTF-8 and otherwise read as Windows-1252, which is what
+    browsers assume for undeclared legacy pages.
+    """
+    encoding, how = sniff_encoding(raw)
+    if encoding is not None:
+        try:
+            return raw.decode(encoding), encoding, how
+        except UnicodeDecodeError:
+            # A wrong declaration; fall through to the content-based guess.
+            pass
+
+    try:
+        return raw.decode('utf-8'), 'utf-8', 'utf-8'
+    except UnicodeDecodeError:
+        return raw.decode('cp1252', errors='replace'), 'cp1252', 'fallback'
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+CACHE_DIR = ".fetch_cache"
+MAX_BYTES = 64 * 1024 * 1024
+MAX_AGE = 30 * 24 * 3600
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class HttpCache:
+    """Content-addressed response cache used for conditional revalidation.
+
+    index.json maps each URL to its validators (ETag / Last-Modified), the
+    sha256 of the body and bookkeeping times; bodies live once under
+    objects/<sha256>, however many URLs share them.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES, max_age=MAX_AGE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def entry(self, url):
+        with self._lock:
+            entry = self.index.get(url)
+        if entry and os.path.exists(self._object_path(entry["sha256"])):
+            return entry
+        return None
+
+    def conditional_headers(self, url):
+        entry = self.entry(url)
+        if not entry:
+            return {}
+        cond = {}
+        if entry.get("etag"):
+            cond["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            cond["If-Modified-Since"] = entry["last_modified"]
+        return cond
+
+    def body(self, url):
+        entry = self.entry(url)
+        if not entry:
+            return None
+        with open(self._object_path(entry["sha256"]), "rb") as f:
+            return f.read()
+
+    def not_modified(self, url):
+        """Record a 304 for `url`. Returns the cached entry."""
+        now = time.time()
+        with self._lock:
+            entry = self.index[url]
+            entry["checked_at"] = now
+            entry["used_at"] = now
+            return entry
+
+    def set_path(self, url, path):
+        with self._lock:
+            if url in self.index:
+                self.index[url]["path"] = path
+
+    def _write_temp(self, obj, body):
+        """Write `body` to a temp file of its own next to `obj` (other
+        threads may be storing the same body). Returns its path."""
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(obj))
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        return tmp
+
+    def store(self, url, resp_headers, body):
+        """Store a 200 response. Returns (entry, changed)."""
+        digest = sha256(body)
+        obj = self._object_path(digest)
+        tmp = None if os.path.exists(obj) else self._write_temp(obj, body)
+
+        now = time.time()
+        # Published and indexed under the lock, so evict() never sees the
+        # object without an entry.
+        with self._lock:
+            if tmp is None and not os.path.exists(obj):
+                # Evicted since the check above.
+                tmp = self._write_temp(obj, body)
+            if tmp is not None:
+                os.replace(tmp, obj)
+            previous = self.index.get(url)
+            entry = {
+                "sha256": digest,
+                "size": len(body),
+                "etag": resp_headers.get("etag"),
+                "last_modified": resp_headers.get("last-modified"),
+                "path": (previous or {}).get("path"),
+                "fetched_at": now if not previous or previous["sha256"] != digest else previous["fetched_at"],
+                "checked_at": now,
+                "used_at": now,
+            }
+            self.index[url] = entry
+        return entry, previous is None or previous["sha256"] != digest
+
+    def evict(self, now=None):
+        """Drop entries not used within max_age, then the least recently
+        used ones until the stored bodies fit in max_bytes. Bodies no entry
+        refers to are deleted, except ones still being written."""
+        now = now or time.time()
+        with self._lock:
+            for url in [u for u, e in self.index.items() if now - e["used_at"] > self.max_age]:
+                del self.index[url]
+
+            sizes = {e["sha256"]: e["size"] for e in self.index.values()}
+            total = sum(sizes.values())
+            for url, entry in sorted(self.index.items(), key=lambda item: item[1]["used_at"]):
+                if total <= self.max_bytes:
+                    break
+                del self.index[url]
+                if all(e["sha256"] != entry["sha256"] for e in self.index.values()):
+                    total -= sizes.pop(entry["sha256"], 0)
+
+            live = {e["sha256"] for e in self.index.values()}
+
+            # Still under the lock: store() publishes objects under it too.
+            objects_dir = os.path.join(self.root, "objects")
+            removed = 0
+            if os.path.isdir(objects_dir):
+                for shard in os.listdir(objects_dir):
+                    shard_dir = os.path.join(objects_dir, shard)
+                    for name in os.listdir(shard_dir):
+                        # *.tmp is a body another writer is still storing.
+                        if name not in live and not name.endswith(".tmp"):
+                            os.remove(os.path.join(shard_dir, name))
+                            removed += 1
+        return removed
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            data = json.dumps(self.index, indent=2, sort_keys=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.index_path)
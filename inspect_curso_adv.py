@@ -1,10 +1,10 @@
-from bs4 import BeautifulSoup
+from html_backend import make_soup
 
-def inspect_html(file_path):
+def inspect_html(file_path, backend=None):
     with open(file_path, 'r', encoding='utf-8') as f:
         html_content = f.read()
 
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = make_soup(html_content, backend, only=['body'])
     body = soup.body
 
     if not body:
@@ -0,0 +1,279 @@
+"""Where the fetch and extract scripts spend their time and memory.
+
+Code marks its stages with
+
+    with stage("json_decode", bytes_in=len(raw)) as st:
+        ...
+        st.bytes_out = len(text)
+
+and every call of a stage adds to its totals: wall time, bytes in and out,
+and the peak of memory allocated (tracemalloc) while it ran. Nothing is
+measured until enable() is called, so an unmeasured stage costs one
+function call. Run any script under `python instrument.py SCRIPT ARGS...`
+to get the figures as JSON, and a cProfile dump with --profile.
+
+The stages are fetch, locate (finding window._site), json_decode, parse
+(BeautifulSoup or HTMLParser), section_walk (building records) and write.
+Peaks are per thread stack, but tracemalloc sees the whole process: with
+concurrent fetches a stage's peak includes what the other threads held.
+"""
+import atexit
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+STAGES = ("fetch", "locate", "json_decode", "parse", "section_walk", "write")
+REPORT_FILE = "stage_report.json"
+
+
+class Stage:
+    __slots__ = ("name", "bytes_in", "bytes_out", "base", "peak")
+
+    def __init__(self, name, bytes_in=0):
+        self.name = name
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self.base = 0
+        self.peak = 0
+
+    def output(self, path):
+        """Count a file the stage wrote as its output."""
+        self.bytes_out += os.path.getsize(path)
+
+
+class _NullStage:
+    """Stands in for a Stage when nothing is measured; takes any figure."""
+
+    bytes_in = bytes_out = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+    def output(self, path):
+        pass
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Timing:
+    """Context manager for one call of a stage."""
+
+    __slots__ = ("recorder", "stage", "started")
+
+    def __init__(self, recorder, stage):
+        self.recorder = recorder
+        self.stage = stage
+
+    def __enter__(self):
+        self.recorder._enter(self.stage)
+        self.started = time.perf_counter()
+        return self.stage
+
+    def __exit__(self, *exc):
+        self.recorder._exit(self.stage, time.perf_counter() - self.started)
+
+
+class Recorder:
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.totals = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Imported here: tracemalloc pulls in linecache, tokenize and pickle,
+        # which every script importing this module would pay for otherwise.
+        import tracemalloc
+
+        self._tracemalloc = tracemalloc
+        self._owns_tracing = memory and not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+
+    def stage(self, name, bytes_in=0):
+        return _Timing(self, Stage(name, bytes_in))
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _enter(self, stage):
+        stack = self._stack()
+        if self.memory:
+            # The peak counter is shared: settle the enclosing stage's peak
+            # before restarting it for this one.
+            current, peak = self._tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak - stack[-1].base)
+            self._tracemalloc.reset_peak()
+            stage.base = current
+        stack.append(stage)
+
+    def _exit(self, stage, seconds):
+        stack = self._stack()
+        stack.pop()
+        if self.memory:
+            peak = self._tracemalloc.get_traced_memory()[1]
+            stage.peak = max(stage.peak, peak - stage.base)
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak - stack[-1].base)
+        with self._lock:
+            totals = self.totals.get(stage.name)
+            if totals is None:
+                totals = self.totals[stage.name] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                    "bytes_in": 0, "bytes_out": 0, "peak_bytes": 0}
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+            totals["max_seconds"] = max(totals["max_seconds"], seconds)
+            totals["bytes_in"] += stage.bytes_in
+            totals["bytes_out"] += stage.bytes_out
+            totals["peak_bytes"] = max(totals["peak_bytes"], stage.peak)
+
+    def report(self):
+        """Totals per stage, listed in pipeline order. Seconds include
+        nested stages (a fetch inside a crawl round, ...)."""
+        with self._lock:
+            names = [name for name in STAGES if name in self.totals]
+            names += sorted(name for name in self.totals if name not in STAGES)
+            stages = {}
+            for name in names:
+                totals = dict(self.totals[name])
+                totals["seconds"] = round(totals["seconds"], 6)
+                totals["max_seconds"] = round(totals["max_seconds"], 6)
+                if not self.memory:
+                    del totals["peak_bytes"]
+                stages[name] = totals
+        return {"wall_seconds": round(time.perf_counter() - self.started, 6), "memory": self.memory,
+                "stages": stages}
+
+    def close(self):
+        if self._owns_tracing:
+            self._tracemalloc.stop()
+            self._owns_tracing = False
+
+
+_recorder = None
+
+
+def enable(memory=True):
+    """Start measuring; returns the Recorder collecting the figures."""
+    global _recorder
+    _recorder = Recorder(memory)
+    return _recorder
+
+
+def disable():
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+    _recorder = None
+
+
+def stage(name, bytes_in=0):
+    """Context manager measuring one call of stage `name`; it yields the
+    Stage, whose bytes_in / bytes_out the caller fills in."""
+    if _recorder is None:
+        return NULL_STAGE
+    return _recorder.stage(name, bytes_in)
+
+
+class DebugSink:
+    """Debug dumps, kept in memory and written with one open per file.
+
+    flush() runs at exit too; a file is truncated the first time it is
+    written in a process and appended to after that.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+        self._written = set()
+
+    def write(self, path, text):
+        buf = self._buffers.get(path)
+        if buf is None:
+            buf = self._buffers[path] = io.StringIO()
+        buf.write(text)
+
+    def flush(self):
+        for path, buf in self._buffers.items():
+            data = buf.getvalue().encode("utf-8")
+            with stage("write", len(data)) as st:
+                with open(path, "ab" if path in self._written else "wb") as f:
+                    f.write(data)
+                st.bytes_out = len(data)
+            self._written.add(path)
+        self._buffers.clear()
+
+
+debug = DebugSink()
+atexit.register(debug.flush)
+
+
+def format_report(report):
+    lines = [f"{'stage':<14}{'calls':>7}{'seconds':>10}{'in':>12}{'out':>12}{'peak':>12}"]
+    for name, totals in report["stages"].items():
+        peak = totals.get("peak_bytes")
+        lines.append(f"{name:<14}{totals['calls']:>7}{totals['seconds']:>10.3f}{totals['bytes_in']:>12}"
+                     f"{totals['bytes_out']:>12}{'' if peak is None else peak:>12}")
+    lines.append(f"wall time {report['wall_seconds']:.3f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a script and report time, bytes and peak memory per stage.")
+    parser.add_argument("--report", default=REPORT_FILE, help="JSON report path")
+    parser.add_argument("--profile", help="also write a cProfile dump (for pstats / snakeviz) here")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows allocation down)")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    import cProfile
+    import runpy
+
+    # Run as a script this file is __main__; the code being measured
+    # imports it as `instrument`, which is the copy to switch on.
+    import instrument
+
+    sys.argv = [args.script, *args.args]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    recorder = instrument.enable(memory=not args.no_memory)
+    profiler = cProfile.Profile() if args.profile else None
+    status = 0
+    try:
+        if profiler is not None:
+            profiler.enable()
+        runpy.run_path(args.script, run_name="__main__")
+    except SystemExit as e:
+        status = e.code
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        instrument.debug.flush()
+        report = recorder.report()
+        report["argv"] = sys.argv
+        report["exit_status"] = status
+        instrument.disable()
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+    print(format_report(report), file=sys.stderr)
+    print(f"Report: {args.report}" + (f", profile: {args.profile}" if profiler is not None else ""), file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+import re
+from functools import lru_cache
+
+# Host (or any parent domain of it) -> category.
+HOST_CATEGORIES = {
+    'drive.google.com': 'drive',
+    'docs.google.com': 'drive',
+    'drive.usercontent.google.com': 'drive',
+    'dropbox.com': 'dropbox',
+    'dropboxusercontent.com': 'dropbox',
+    'db.tt': 'dropbox',
+    'bit.ly': 'shortener',
+    'bitly.com': 'shortener',
+    'tinyurl.com': 'shortener',
+    'cutt.ly': 'shortener',
+    'encurtador.com.br': 'shortener',
+    'mybid.com.br': 'mybid',
+}
+
+# The substrings the downloads filter has always matched, as one
+# alternation so a single scan finds all of them. Host categories take
+# precedence, then file types, then the rest in this order.
+LINK_PATTERN = re.compile(
+    r'(?P<drive>drive\.google)'
+    r'|(?P<dropbox>dropbox)'
+    r'|\.(?P<file>pdf|docx?|xlsx?|pptx?|zip|rar)'
+    r'|(?P<shortener>bit\.ly)'
+    r'|(?P<mybid>mybid\.com\.br)'
+    r'|(?P<download>download)',
+    re.I,
+)
+PRECEDENCE = ('drive', 'dropbox', 'shortener', 'file', 'mybid', 'download')
+
+# Host of an absolute URL; cheaper than urllib.parse.urlsplit per link.
+HOST_PATTERN = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://(?:[^@/?#]*@)?([^:/?#]+)')
+
+# Never downloads, even when the address mentions a matching domain
+# (e.g. mailto:contato@mybid.com.br).
+IGNORED_SCHEMES = ('mailto:', 'tel:', 'javascript:', 'whatsapp:')
+
+
+def host_category(host):
+    while host:
+        category = HOST_CATEGORIES.get(host)
+        if category:
+            return category
+        _, _, host = host.partition('.')
+    return None
+
+
+@lru_cache(maxsize=4096)
+def classify_link(href):
+    """Category of a link, or None when it is not a download candidate.
+
+    One of 'drive', 'dropbox', 'shortener', 'file:<ext>', 'mybid' or
+    'download'.
+    """
+    if not href or href.lower().startswith(IGNORED_SCHEMES):
+        return None
+
+    match = HOST_PATTERN.match(href)
+    category = host_category(match.group(1).lower()) if match else None
+
+    found = {}
+    for match in LINK_PATTERN.finditer(href):
+        found.setdefault(match.lastgroup, match.group(match.lastgroup))
+
+    if category in ('drive', 'dropbox', 'shortener'):
+        return category
+    for name in PRECEDENCE:
+        if name in found:
+            if name == 'file':
+                return 'file:' + found['file'].lower()
+            return name
+    return category
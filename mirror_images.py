@@ -0,0 +1,222 @@
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import urllib.parse
+
+from fetch_pages import Fetcher
+
+MIRROR_DIR = os.path.join("public", "mirror")
+MANIFEST_NAME = "manifest.json"
+# public/ is served from the site root.
+URL_PREFIX = "/mirror"
+DEFAULT_INPUTS = ["*_data.txt", "curso_adv_data.json", "downloads_data.json", "downloads_data.jsonl"]
+
+# Widths of the WebP variants; only those narrower than the original are made.
+WIDTHS = (480, 960, 1600)
+WEBP_QUALITY = 80
+# Save the manifest after this many downloads, so an interrupted run
+# loses little.
+SAVE_EVERY = 20
+
+IMAGE_LINE = re.compile(r'^\s*(?:- )?Image: (\S+)', re.M)
+
+CONTENT_TYPES = {
+    "image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif",
+    "image/webp": ".webp", "image/avif": ".avif", "image/svg+xml": ".svg",
+}
+MAGIC = ((b"\xff\xd8\xff", ".jpg"), (b"\x89PNG", ".png"), (b"GIF8", ".gif"), (b"<svg", ".svg"))
+
+
+def _walk_json(value, found):
+    if isinstance(value, dict):
+        if value.get("type") == "image" and isinstance(value.get("src"), str):
+            found.append(value["src"])
+        if isinstance(value.get("images"), list):
+            found.extend(src for src in value["images"] if isinstance(src, str))
+        for child in value.values():
+            if isinstance(child, (dict, list)):
+                _walk_json(child, found)
+    elif isinstance(value, list):
+        for child in value:
+            _walk_json(child, found)
+
+
+def collect_urls(paths):
+    """Image URLs referenced by extracted files, each once, in order.
+
+    *_data.txt files give their "Image:" lines; JSON (and JSON Lines)
+    files their "images" lists and image records' "src" (curso_adv's
+    images already fall back to data-src).
+    """
+    found = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".txt"):
+                found.extend(IMAGE_LINE.findall(f.read()))
+            elif path.endswith(".jsonl"):
+                for line in f:
+                    if line.strip():
+                        _walk_json(json.loads(line), found)
+            else:
+                _walk_json(json.load(f), found)
+    return [url for url in dict.fromkeys(found) if url.startswith(("http://", "https://"))]
+
+
+def extension(resp):
+    content_type = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in CONTENT_TYPES:
+        return CONTENT_TYPES[content_type]
+    body = resp.body
+    if body[:4] == b"RIFF" and body[8:12] == b"WEBP":
+        return ".webp"
+    for magic, ext in MAGIC:
+        if body.startswith(magic):
+            return ext
+    ext = os.path.splitext(urllib.parse.urlsplit(resp.url).path)[1].lower()
+    return ext if ext in CONTENT_TYPES.values() else ".bin"
+
+
+def write_file(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def make_variants(body, stem, out_dir, url_prefix, widths=WIDTHS):
+    """Resized WebP copies of an image, as ({width: local URL}, (w, h)).
+
+    Needs Pillow; without it (or for formats it cannot read, and images
+    Pillow refuses to decode as decompression bombs) there are no variants
+    and the original is used as is.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return {}, None
+    try:
+        with Image.open(io.BytesIO(body)) as img:
+            img.load()
+            size = img.size
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "P") else "RGB")
+            variants = {}
+            for width in [w for w in widths if w < size[0]] + [size[0]]:
+                name = f"{stem}-{width}.webp"
+                path = os.path.join(out_dir, name)
+                if not os.path.exists(path):
+                    resized = img if width == size[0] else img.resize(
+                        (width, max(1, round(size[1] * width / size[0]))), Image.LANCZOS)
+                    out = io.BytesIO()
+                    resized.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+                    write_file(path, out.getvalue())
+                variants[str(width)] = f"{url_prefix}/{name}"
+            return variants, size
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return {}, None
+
+
+class MirrorManifest:
+    """public/mirror/manifest.json: original URL -> local copy.
+
+    Entries point at files named by the sha256 of their content, so URLs
+    serving the same bytes share one file (and one set of variants).
+    """
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self.by_sha = {entry["sha256"]: entry for entry in self.entries.values()}
+
+    def done(self, url):
+        entry = self.entries.get(url)
+        return bool(entry) and os.path.exists(os.path.join(self.out_dir, entry["file"]))
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def store(resp, manifest, url_prefix, variants=True):
+    """Write a downloaded image (once per content hash). Returns its entry."""
+    digest = hashlib.sha256(resp.body).hexdigest()
+    known = manifest.by_sha.get(digest)
+    if known and os.path.exists(os.path.join(manifest.out_dir, known["file"])):
+        return dict(known)
+
+    stem = digest[:16]
+    name = stem + extension(resp)
+    write_file(os.path.join(manifest.out_dir, name), resp.body)
+    entry = {
+        "file": name,
+        "path": f"{url_prefix}/{name}",
+        "sha256": digest,
+        "bytes": len(resp.body),
+        "content_type": resp.headers.get("content-type"),
+    }
+    if variants:
+        entry["variants"], size = make_variants(resp.body, stem, manifest.out_dir, url_prefix)
+        if size:
+            entry["width"], entry["height"] = size
+    manifest.by_sha[digest] = entry
+    return dict(entry)
+
+
+def mirror_images(urls, out_dir=MIRROR_DIR, url_prefix=URL_PREFIX, max_workers=8, variants=True):
+    """Download `urls` into `out_dir`, skipping those already mirrored.
+
+    Returns (downloaded, skipped, {url: error}).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = MirrorManifest(out_dir)
+    todo = [url for url in dict.fromkeys(urls) if not manifest.done(url)]
+    errors = {}
+    downloaded = 0
+    try:
+        with Fetcher(max_workers=max_workers) as fetcher:
+            for url, result in fetcher.iter_fetch(todo):
+                if isinstance(result, Exception):
+                    errors[url] = str(result)
+                    continue
+                manifest.entries[url] = store(result, manifest, url_prefix, variants)
+                downloaded += 1
+                if downloaded % SAVE_EVERY == 0:
+                    manifest.save()
+    finally:
+        manifest.save()
+    return downloaded, len(urls) - len(todo), errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mirror the images referenced by the extracted data into public/.")
+    parser.add_argument("inputs", nargs="*", help=f"extracted files or globs (default: {' '.join(DEFAULT_INPUTS)})")
+    parser.add_argument("--out-dir", default=MIRROR_DIR)
+    parser.add_argument("--url-prefix", default=URL_PREFIX, help="URL the out dir is served at")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--no-variants", action="store_true", help="skip the resized WebP copies")
+    args = parser.parse_args(argv)
+
+    paths = sorted({path for pattern in args.inputs or DEFAULT_INPUTS for path in glob.glob(pattern)})
+    urls = collect_urls(paths)
+    downloaded, skipped, errors = mirror_images(urls, args.out_dir, args.url_prefix.rstrip("/"),
+                                                args.workers, not args.no_variants)
+    for url, error in errors.items():
+        print(f"FAILED {url}: {error}")
+    print(f"{len(urls)} images in {len(paths)} files: {downloaded} downloaded, {skipped} already mirrored, "
+          f"{len(errors)} failed. Manifest: {os.path.join(args.out_dir, MANIFEST_NAME)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
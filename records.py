@@ -0,0 +1,195 @@
+"""Record types shared by the extractors.
+
+A dict per element costs a hash table; these keep their fields in
+__slots__, which takes several times less memory when a full-site crawl
+holds hundreds of thousands of them. Every record converts to and from the
+JSON the extractors write: None fields are left out, and links, images and
+text elements carry a "type" so a mixed list can be read back.
+"""
+import json
+
+
+class Record:
+    __slots__ = ()
+
+    # "type" tag written for element records, None for containers.
+    kind = None
+    # (attribute, JSON key) pairs, in output order.
+    FIELDS = ()
+    # attribute -> record class, for fields holding a list of records.
+    NESTED = {}
+
+    def to_dict(self):
+        data = {"type": self.kind} if self.kind else {}
+        for attr, key in self.FIELDS:
+            value = getattr(self, attr)
+            if value is None:
+                continue
+            if attr in self.NESTED:
+                value = [record.to_dict() for record in value]
+            data[key] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        fields = {}
+        for attr, key in cls.FIELDS:
+            value = data.get(key)
+            if value is not None and attr in cls.NESTED:
+                value = [cls.NESTED[attr].from_dict(item) for item in value]
+            fields[attr] = value
+        return cls(**fields)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, attr) == getattr(other, attr) for attr, _ in self.FIELDS)
+
+    def __repr__(self):
+        fields = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr, _ in self.FIELDS
+                           if getattr(self, attr) is not None)
+        return f"{type(self).__name__}({fields})"
+
+
+class Link(Record):
+    __slots__ = ("href", "text", "title", "cls", "category")
+    kind = "link"
+    FIELDS = (("href", "href"), ("text", "text"), ("title", "title"), ("cls", "class"), ("category", "category"))
+
+    def __init__(self, href=None, text=None, title=None, cls=None, category=None):
+        self.href = href
+        self.text = text
+        self.title = title
+        self.cls = cls
+        self.category = category
+
+
+class Image(Record):
+    __slots__ = ("src", "alt", "cls")
+    kind = "image"
+    FIELDS = (("src", "src"), ("alt", "alt"), ("cls", "class"))
+
+    def __init__(self, src=None, alt=None, cls=None):
+        self.src = src
+        self.alt = alt
+        self.cls = cls
+
+
+class TextElement(Record):
+    __slots__ = ("tag", "text", "cls")
+    kind = "text_element"
+    FIELDS = (("tag", "tag"), ("text", "text"), ("cls", "class"))
+
+    def __init__(self, tag=None, text=None, cls=None):
+        self.tag = tag
+        self.text = text
+        self.cls = cls
+
+
+# Headings for Section.items, by the binding field they came from.
+ITEM_GROUPS = {"list": "List Items", "cards": "Cards"}
+
+
+class Section(Record):
+    """A page section, or an item inside one (a list entry or a card).
+
+    `images` holds image URLs and `buttons` Link records. Builder sections
+    fill the binding fields (title ... link, items); sections scraped from
+    plain HTML fill headers, paragraphs and list_items instead.
+    """
+
+    __slots__ = ("id", "category", "classes", "title", "subtitle", "description", "price", "link",
+                 "headers", "paragraphs", "images", "buttons", "list_items", "items")
+    FIELDS = tuple((attr, attr) for attr in __slots__)
+
+    def __init__(self, id=None, category=None, classes=None, title=None, subtitle=None, description=None,
+                 price=None, link=None, headers=None, paragraphs=None, images=None, buttons=None,
+                 list_items=None, items=None):
+        self.id = id
+        self.category = category
+        self.classes = classes
+        self.title = title
+        self.subtitle = subtitle
+        self.description = description
+        self.price = price
+        self.link = link
+        self.headers = headers
+        self.paragraphs = paragraphs
+        self.images = images
+        self.buttons = buttons
+        self.list_items = list_items
+        self.items = items
+
+    def _item_lines(self):
+        lines = []
+        for label, value in (("Title", self.title), ("Subtitle", self.subtitle),
+                             ("Description", self.description), ("Price", self.price)):
+            if value:
+                lines.append(f"{label}: {value}")
+        lines.extend(f"Image: {src}" for src in self.images or ())
+        if self.link:
+            lines.append(f"Link: {self.link}")
+        return lines
+
+    def write_text(self, out):
+        out.write(f"Category: {self.category}\n")
+        for line in self._item_lines():
+            out.write(_indent_continuation(line, "  ") + "\n")
+        for button in self.buttons or ():
+            out.write(f"Button: {button.text} -> {button.href}\n")
+
+        group = None
+        for item in self.items or ():
+            if item.category != group:
+                group = item.category
+                out.write(f"{ITEM_GROUPS.get(group, group)}:\n")
+            lines = item._item_lines() or ["(empty)"]
+            for i, line in enumerate(lines):
+                out.write(("  - " if i == 0 else "    ") + _indent_continuation(line, "      ") + "\n")
+        out.write("=" * 20 + "\n")
+
+
+def _indent_continuation(text, indent):
+    """Multi-line field values keep their lines under the field."""
+    first, *rest = text.split("\n")
+    return "\n".join([first] + [line and indent + line for line in rest])
+
+
+Section.NESTED = {"buttons": Link, "items": Section}
+
+
+class Page(Record):
+    __slots__ = ("uri", "title", "encoding", "sections")
+    FIELDS = (("uri", "uriPath"), ("title", "title"), ("encoding", "encoding"), ("sections", "sections"))
+    NESTED = {"sections": Section}
+
+    def __init__(self, uri=None, title=None, encoding=None, sections=None):
+        self.uri = uri
+        self.title = title
+        self.encoding = encoding
+        self.sections = sections
+
+    def write_text(self, out):
+        """The plain-text layout of the *_data.txt files."""
+        out.write(f"Page Title: {self.title}\n")
+        out.write("-" * 20 + "\n")
+        for section in self.sections or ():
+            section.write_text(out)
+
+
+ELEMENTS = {record.kind: record for record in (Link, Image, TextElement)}
+
+
+def element_from_dict(data):
+    """Link, Image or TextElement, by the "type" of `data`."""
+    return ELEMENTS[data["type"]].from_dict(data)
+
+
+def to_json(record, **kwargs):
+    return json.dumps(record.to_dict(), **kwargs)
+
+
+def from_json(text, cls=None):
+    """Read one record back; `cls` defaults to the element named by "type"."""
+    data = json.loads(text)
+    return cls.from_dict(data) if cls else element_from_dict(data)
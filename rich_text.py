@@ -0,0 +1,80 @@
+"""Clean up the HTML fragments the site builder stores in binding fields.
+
+Titles and descriptions come as e.g.
+'<font class="cstm-cl kv-ee-custom-text-cl4">Texto<br><br>✔&nbsp;<b>Objetivo</b></font>'
+plus stray zero-width spaces. plain_text() turns that into text with one
+line per <br> or block; safe_markup() keeps only a few harmless tags
+(<b>, <i>, <u>, <br>, links ...) without attributes, ready to paste into
+the React pages.
+
+The same fragments repeat across sections and pages, so both are memoized
+on the raw string.
+"""
+import html
+import re
+from functools import lru_cache
+
+CACHE_SIZE = 4096
+
+ZERO_WIDTH = re.compile('[\u200b\u200c\u200d\u2060\ufeff]')
+DROPPED = re.compile(r'<(script|style)\b.*?</\1\s*>', re.I | re.S)
+COMMENT = re.compile(r'<!--.*?-->', re.S)
+# <br>, <hr> and the ends of block elements start a new line.
+LINE_BREAK = re.compile(r'<(?:br|hr)\b[^>]*>|</(?:p|div|li|h[1-6]|ul|ol|tr)\s*>', re.I)
+TAG = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)\b([^>]*)>')
+ANY_TAG = re.compile(r'<[^>]*>')
+SPACES = re.compile(r'[ \t\r\f\v\xa0]+')
+BLANK_LINES = re.compile(r'\n\s*\n+')
+EDGE_BREAKS = re.compile(r'^(?:<br>\s*)+|(?:\s*<br>)+$')
+HREF = re.compile(r'''\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.I)
+# Anything markup-like; strings without it only need their spaces tidied.
+NEEDS_WORK = re.compile('[<&\u200b\u200c\u200d\u2060\ufeff\xa0]')
+
+# Tags safe_markup() keeps, without their attributes (links keep href).
+SAFE_TAGS = {'a', 'b', 'strong', 'i', 'em', 'u', 'br', 'p', 'ul', 'ol', 'li'}
+VOID_TAGS = {'br'}
+SAFE_SCHEMES = ('http:', 'https:', 'mailto:', 'tel:', 'page:', '/', '#')
+
+
+def _tidy_lines(text):
+    lines = (SPACES.sub(' ', line).strip() for line in text.split('\n'))
+    return BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def plain_text(fragment):
+    """Text of a builder HTML fragment, one line per <br> or block."""
+    if not NEEDS_WORK.search(fragment):
+        return _tidy_lines(fragment)
+    text = COMMENT.sub('', DROPPED.sub('', fragment))
+    text = ANY_TAG.sub('', LINE_BREAK.sub('\n', text))
+    text = ZERO_WIDTH.sub('', html.unescape(text))
+    return _tidy_lines(text)
+
+
+def _safe_tag(match):
+    closing, name, attrs = match.groups()
+    name = name.lower()
+    if name not in SAFE_TAGS:
+        return '<br>' if LINE_BREAK.fullmatch(match.group(0)) else ''
+    if closing:
+        return '' if name in VOID_TAGS else f'</{name}>'
+    if name == 'a':
+        href = HREF.search(attrs)
+        href = href and next(value for value in href.groups() if value is not None)
+        if href and href.strip().lower().startswith(SAFE_SCHEMES):
+            return f'<a href="{html.escape(html.unescape(href.strip()))}">'
+        return '<a>'
+    return f'<{name}>'
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def safe_markup(fragment):
+    """The fragment with only SAFE_TAGS left, attributes removed (links
+    keep a safe href), &nbsp; and zero-width spaces gone."""
+    if not NEEDS_WORK.search(fragment):
+        return SPACES.sub(' ', fragment.replace('\n', ' ')).strip()
+    text = COMMENT.sub('', DROPPED.sub('', fragment))
+    text = TAG.sub(_safe_tag, text)
+    text = ZERO_WIDTH.sub('', text.replace('&nbsp;', ' ').replace('\n', ' '))
+    return EDGE_BREAKS.sub('', SPACES.sub(' ', text).strip())
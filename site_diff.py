@@ -0,0 +1,260 @@
+"""Structural diff between two decodes of window._site.
+
+Every page, section and binding subtree gets a Merkle hash: a digest of its
+children's digests, computed once per node. Two subtrees with the same
+digest are equal, so the diff descends only where the digests differ and an
+unchanged page or section costs a single comparison however large it is.
+
+Sections are matched by id within a page. A changed section is reported
+with the paths of the fields that changed (binding.list[2].title, ...);
+list elements are aligned by digest, so an item inserted in the middle
+shows up as one added item rather than every later one changing.
+"""
+import argparse
+import difflib
+import glob
+import hashlib
+import json
+import os
+import sys
+
+from extract_site import output_name
+from site_model import load_site_models
+from snapshot_store import is_archive_ref
+
+# The React page rebuilt from each builder page's extracted text.
+COMPONENTS = {
+    "escola-de-formagco-para-novos-leiloeiros": "components/EscolaLeiloeiros.tsx",
+    "mentoria-trilha-do-arrematante": "Mentoria.tsx",
+    "o-ecossistema-e-lance-e-my-bid": "Ecossistema.tsx",
+    "indique-a-e-lance-para-realizar-o-seu-leilao": "Indique.tsx",
+}
+
+# Values longer than this are cut in the text report.
+SHOW_CHARS = 80
+
+
+class MerkleHasher:
+    """Digest of a decoded JSON value, memoized per node.
+
+    The memo is keyed by id(), so the hasher must not outlive the values it
+    has seen (they are kept alive alongside their digest).
+    """
+
+    def __init__(self):
+        self._memo = {}
+
+    def __call__(self, value):
+        key = id(value)
+        known = self._memo.get(key)
+        if known is not None:
+            return known[0]
+        h = hashlib.blake2b(digest_size=16)
+        if isinstance(value, dict):
+            h.update(b"d")
+            for k in sorted(value):
+                h.update(k.encode("utf-8") + b"\0")
+                h.update(self(value[k]))
+        elif isinstance(value, list):
+            h.update(b"l")
+            for child in value:
+                h.update(self(child))
+        else:
+            h.update(b"s" + json.dumps(value).encode("utf-8"))
+        digest = h.digest()
+        if isinstance(value, (dict, list)):
+            self._memo[key] = (digest, value)
+        return digest
+
+
+def _join(path, key):
+    return f"{path}.{key}" if path else str(key)
+
+
+# The side of a change where the field does not exist (None is JSON null).
+_MISSING = object()
+
+
+def _change(path, old, new):
+    change = {"path": path}
+    if old is not _MISSING:
+        change["old"] = old
+    if new is not _MISSING:
+        change["new"] = new
+    return change
+
+
+def diff_values(old, new, hasher, path=""):
+    """{"path", "old", "new"} for every leaf that differs; the key of a
+    missing side is left out (a removed or added subtree is reported whole,
+    not leaf by leaf)."""
+    if hasher(old) == hasher(new):
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in list(old) + [key for key in new if key not in old]:
+            if key not in new:
+                changes.append(_change(_join(path, key), old[key], _MISSING))
+            elif key not in old:
+                changes.append(_change(_join(path, key), _MISSING, new[key]))
+            else:
+                changes.extend(diff_values(old[key], new[key], hasher, _join(path, key)))
+        return changes
+    if isinstance(old, list) and isinstance(new, list):
+        changes = []
+        matcher = difflib.SequenceMatcher(None, [hasher(v) for v in old], [hasher(v) for v in new], autojunk=False)
+        for op, i1, i2, j1, j2 in matcher.get_opcodes():
+            if op == "equal":
+                continue
+            # Pair up replaced elements so their own fields are diffed.
+            paired = min(i2 - i1, j2 - j1) if op == "replace" else 0
+            for k in range(paired):
+                changes.extend(diff_values(old[i1 + k], new[j1 + k], hasher, f"{path}[{j1 + k}]"))
+            for i in range(i1 + paired, i2):
+                changes.append(_change(f"{path}[{i}]", old[i], _MISSING))
+            for j in range(j1 + paired, j2):
+                changes.append(_change(f"{path}[{j}]", _MISSING, new[j]))
+        return changes
+    return [_change(path, old, new)]
+
+
+def _section_key(section, index):
+    return section.get("id", f"#{index}")
+
+
+def diff_page(old, new, hasher):
+    """Changes between two versions of one page, or None when equal.
+
+    Sections are only compared when both versions carry them: a snapshot
+    only fills in `sections` for the page that was requested.
+    """
+    if hasher(old) == hasher(new):
+        return None
+    fields = {key: value for key, value in old.items() if key != "sections"}
+    new_fields = {key: value for key, value in new.items() if key != "sections"}
+    change = {"uriPath": new.get("uriPath"), "fields": diff_values(fields, new_fields, hasher),
+              "added": [], "removed": [], "changed": [], "reordered": False}
+
+    old_sections, new_sections = old.get("sections"), new.get("sections")
+    if old_sections and new_sections and hasher(old_sections) != hasher(new_sections):
+        before = {_section_key(s, i): s for i, s in enumerate(old_sections)}
+        after = {_section_key(s, i): s for i, s in enumerate(new_sections)}
+        for key, section in after.items():
+            if key not in before:
+                change["added"].append({"id": key, "category": section.get("category")})
+            elif hasher(section) != hasher(before[key]):
+                change["changed"].append({"id": key, "category": section.get("category"),
+                                          "fields": diff_values(before[key], section, hasher)})
+        change["removed"] = [{"id": key, "category": section.get("category")}
+                             for key, section in before.items() if key not in after]
+        common = [key for key in before if key in after]
+        change["reordered"] = common != [key for key in after if key in before]
+    if not any((change["fields"], change["added"], change["removed"], change["changed"], change["reordered"])):
+        return None
+    return change
+
+
+def diff_sites(old, new):
+    """Diff two SiteModels (or window._site dicts).
+
+    Returns {"added": [uriPath], "removed": [uriPath], "changed": [page change]}
+    where a page change is what diff_page returns.
+    """
+    hasher = MerkleHasher()
+    before = old.by_uri if hasattr(old, "by_uri") else {p.get("uriPath"): p for p in old.get("pages", [])}
+    after = new.by_uri if hasattr(new, "by_uri") else {p.get("uriPath"): p for p in new.get("pages", [])}
+    changed = []
+    for uri, page in after.items():
+        if uri in before:
+            change = diff_page(before[uri], page, hasher)
+            if change is not None:
+                changed.append(change)
+    return {
+        "added": [uri for uri in after if uri not in before],
+        "removed": [uri for uri in before if uri not in after],
+        "changed": changed,
+    }
+
+
+def affected_targets(diff):
+    """The extracted text files and React components to update, per page."""
+    targets = {}
+    for uri in diff["added"] + [change["uriPath"] for change in diff["changed"]]:
+        targets[uri] = [output_name(uri)] + ([COMPONENTS[uri]] if uri in COMPONENTS else [])
+    return targets
+
+
+def _show(value):
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= SHOW_CHARS else text[:SHOW_CHARS - 3] + "..."
+
+
+def _field_lines(fields, indent):
+    for field in fields:
+        path = field["path"]
+        if "old" not in field:
+            yield f"{indent}+ {path}: {_show(field['new'])}"
+        elif "new" not in field:
+            yield f"{indent}- {path}: {_show(field['old'])}"
+        else:
+            yield f"{indent}~ {path}: {_show(field['old'])} -> {_show(field['new'])}"
+
+
+def format_diff(diff):
+    lines = [f"+ page {uri}" for uri in diff["added"]]
+    lines += [f"- page {uri}" for uri in diff["removed"]]
+    targets = affected_targets(diff)
+    for change in diff["changed"]:
+        lines.append(f"~ page {change['uriPath']} (update {', '.join(targets[change['uriPath']])})")
+        lines.extend(_field_lines(change["fields"], "    "))
+        for section in change["added"]:
+            lines.append(f"  + section {section['id']} ({section['category']})")
+        for section in change["removed"]:
+            lines.append(f"  - section {section['id']} ({section['category']})")
+        for section in change["changed"]:
+            lines.append(f"  ~ section {section['id']} ({section['category']})")
+            lines.extend(_field_lines(section["fields"], "      "))
+        if change["reordered"]:
+            lines.append("  ~ sections reordered")
+    return "\n".join(lines)
+
+
+def snapshot_paths(spec):
+    """Snapshots named by a CLI argument: a file, an archive: reference, a
+    glob, or a directory of temp_*.html (a crawl)."""
+    if is_archive_ref(spec):
+        return [spec]
+    if os.path.isdir(spec):
+        return sorted(glob.glob(os.path.join(spec, "temp_*.html")))
+    return sorted(glob.glob(spec)) or [spec]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show which pages and sections changed between two snapshots.")
+    parser.add_argument("old", nargs="+", help="old snapshot(s): files, globs, crawl directories or archive: refs")
+    parser.add_argument("--new", nargs="+", required=True, help="new snapshot(s), same forms")
+    parser.add_argument("--json", action="store_true", help="write the diff as JSON")
+    args = parser.parse_args(argv)
+
+    models = []
+    for specs in (args.old, args.new):
+        model = load_site_models([path for spec in specs for path in snapshot_paths(spec)])
+        if model is None:
+            print(f"Could not find window._site in {' '.join(specs)}", file=sys.stderr)
+            return 2
+        models.append(model)
+
+    diff = diff_sites(*models)
+    if args.json:
+        diff["targets"] = affected_targets(diff)
+        json.dump(diff, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    elif any(diff.values()):
+        print(format_diff(diff))
+    else:
+        print("No changes")
+    return 1 if any(diff[key] for key in ("added", "removed", "changed")) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+import json
+import mmap
+import re
+from contextlib import contextmanager
+
+from instrument import stage
+
+# The builder inlines the whole site model as `window._site={...};` in a
+# <script> tag of every page.
+MARKER = re.compile(rb"window\._site\s*=\s*")
+
+_decoder = json.JSONDecoder()
+
+_WS = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_SCALAR = re.compile(rb"[^,:\]}\s]+")
+# Everything up to the next bracket outside a string literal, in one match.
+_TO_BRACKET = re.compile(rb'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*([{}\[\]])')
+
+
+@contextmanager
+def open_snapshot(file_path):
+    """Memory-map a snapshot read-only.
+
+    An "archive:" reference (see snapshot_store) is inflated into memory
+    instead; everything below works on bytes just as well.
+    """
+    if file_path.startswith("archive:"):
+        from snapshot_store import read_bytes
+
+        yield read_bytes(file_path)
+        return
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def find_site(buf, pos=0):
+    """Byte offset where the window._site value starts, or -1."""
+    match = MARKER.search(buf, pos)
+    return match.end() if match else -1
+
+
+def script_end(buf, start):
+    """Offset of the </script> closing the inline script at `start`.
+
+    HTML ends a script at the first `</script>`, so the builder must escape
+    it inside the JSON and the object can never extend past this point.
+    """
+    end = buf.find(b"</script>", start)
+    return len(buf) if end == -1 else end
+
+
+def decode_at(buf, start, end=None):
+    """Decode the JSON value at byte `start`.
+
+    Only the bytes of the enclosing script (up to `end`, found when not
+    given) are copied out of the buffer, never the rest of the document,
+    and raw_decode stops exactly at the end of the value.
+    """
+    if end is None:
+        end = script_end(buf, start)
+    with stage("json_decode", end - start):
+        return _decoder.raw_decode(buf[start:end].decode("utf-8"))[0]
+
+
+def _match(pattern, buf, pos):
+    match = pattern.match(buf, pos)
+    if match is None:
+        raise ValueError(f"Malformed JSON at byte {pos}")
+    return match
+
+
+def skip_value(buf, pos):
+    """Byte offset just past the JSON value at `pos`, without decoding it."""
+    c = buf[pos:pos + 1]
+    if c == b'"':
+        return _match(_STRING, buf, pos).end()
+    if c not in (b"{", b"["):
+        return _match(_SCALAR, buf, pos).end()
+
+    depth = 0
+    while True:
+        match = _match(_TO_BRACKET, buf, pos)
+        pos = match.end()
+        if match.group(1) in (b"{", b"["):
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def _key(match):
+    raw = match.group()
+    if b"\\" in raw:
+        return json.loads(raw)
+    return raw[1:-1].decode("utf-8")
+
+
+def _expect(buf, pos, char):
+    if buf[pos:pos + 1] != char:
+        raise ValueError(f"Expected {char!r} at byte {pos}")
+    return _WS.match(buf, pos + 1).end()
+
+
+def iter_members(buf, pos):
+    """Yield (key, value_start, value_end) for the object at `pos`.
+
+    Values are only located, not decoded; decode the ones you need with
+    json.loads(buf[value_start:value_end]).
+    """
+    pos = _expect(buf, pos, b"{")
+    if buf[pos:pos + 1] == b"}":
+        return
+    while True:
+        key_match = _match(_STRING, buf, pos)
+        key = _key(key_match)
+        pos = _expect(buf, _WS.match(buf, key_match.end()).end(), b":")
+        end = skip_value(buf, pos)
+        yield key, pos, end
+        pos = _WS.match(buf, end).end()
+        if buf[pos:pos + 1] == b"}":
+            return
+        pos = _expect(buf, pos, b",")
+
+
+def iter_items(buf, pos):
+    """Yield (start, end) for each element of the array at `pos`."""
+    pos = _expect(buf, pos, b"[")
+    if buf[pos:pos + 1] == b"]":
+        return
+    while True:
+        end = skip_value(buf, pos)
+        yield pos, end
+        pos = _WS.match(buf, end).end()
+        if buf[pos:pos + 1] == b"]":
+            return
+        pos = _expect(buf, pos, b",")
+
+
+def iter_pages(buf, start):
+    """Yield (uriPath, start, end) for each entry of window._site.pages.
+
+    Only the uriPath strings are decoded; every other subtree of the site
+    (theme, globals, assets, other pages) is skipped over byte-wise, and
+    each page is walked once.
+    """
+    for key, value_start, _ in iter_members(buf, start):
+        if key != "pages":
+            continue
+        pos = _expect(buf, value_start, b"[")
+        if buf[pos:pos + 1] == b"]":
+            return
+        while True:
+            page_start = pos
+            uri = None
+            last_end = None
+            for page_key, member_start, member_end in iter_members(buf, page_start):
+                if page_key == "uriPath":
+                    uri = json.loads(buf[member_start:member_end])
+                last_end = member_end
+            if last_end is None:
+                page_end = skip_value(buf, page_start)
+            else:
+                page_end = _WS.match(buf, last_end).end() + 1
+            yield uri, page_start, page_end
+
+            pos = _WS.match(buf, page_end).end()
+            if buf[pos:pos + 1] == b"]":
+                return
+            pos = _expect(buf, pos, b",")
+        return
+
+
+def load_pages(file_path, uri_paths):
+    """Decode only the window._site pages whose uriPath is in `uri_paths`.
+
+    Returns {uriPath: page}, or None when the page has no window._site.
+    Scanning stops as soon as every requested page has been found.
+    """
+    wanted = set(uri_paths)
+    with open_snapshot(file_path) as mm:
+        with stage("locate", len(mm)):
+            start = find_site(mm)
+            if start == -1:
+                return None
+            spans = {}
+            for uri, page_start, page_end in iter_pages(mm, start):
+                if uri in wanted:
+                    spans[uri] = (page_start, page_end)
+                    if len(spans) == len(wanted):
+                        break
+        with stage("json_decode", sum(end - start for start, end in spans.values())):
+            return {uri: json.loads(mm[start:end]) for uri, (start, end) in spans.items()}
+
+
+def page_uris_bytes(buf):
+    with stage("locate", len(buf)):
+        start = find_site(buf)
+        if start == -1:
+            return []
+        return [uri for uri, _, _ in iter_pages(buf, start)]
+
+
+def page_uris(file_path):
+    """uriPath of every page listed in the snapshot, without decoding them."""
+    with open_snapshot(file_path) as mm:
+        return page_uris_bytes(mm)
+
+
+def load_site_bytes(buf):
+    with stage("locate", len(buf)):
+        start = find_site(buf)
+        if start == -1:
+            return None
+        end = script_end(buf, start)
+    return decode_at(buf, start, end)
+
+
+def load_site(file_path):
+    """Decode window._site from a snapshot file.
+
+    Returns None when the page has no window._site; raises ValueError
+    (json.JSONDecodeError) when the object is malformed.
+    """
+    with open_snapshot(file_path) as mm:
+        return load_site_bytes(mm)
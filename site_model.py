@@ -0,0 +1,97 @@
+import os
+
+from site_json import load_pages, load_site
+
+# site_json.load_pages skips unwanted pages in Python, which is several
+# times slower than the full C decode; it only pays off in memory, once a
+# snapshot is this big.
+SELECTIVE_MIN_BYTES = 16 * 1024 * 1024
+
+
+class SiteModel:
+    """Index over a decoded window._site object.
+
+    Every snapshot carries the full `pages` list, but the builder only fills
+    in `sections` for the page that was requested, so models decoded from
+    several snapshots can be merged into one index with `merge`.
+    """
+
+    def __init__(self, site):
+        self.site = site
+        self.by_uri = {}
+        self.sections_by_category = {}
+        for page in site.get('pages', []):
+            self.add_page(page)
+
+    def add_page(self, page):
+        uri = page.get('uriPath')
+        current = self.by_uri.get(uri)
+        if current is not None and (current.get('sections') or not page.get('sections')):
+            return
+        if current is not None:
+            self._unindex_sections(uri)
+        self.by_uri[uri] = page
+        for section in page.get('sections', []):
+            self.sections_by_category.setdefault(section.get('category'), []).append((uri, section))
+
+    def _unindex_sections(self, uri):
+        for category, entries in list(self.sections_by_category.items()):
+            entries = [entry for entry in entries if entry[0] != uri]
+            if entries:
+                self.sections_by_category[category] = entries
+            else:
+                del self.sections_by_category[category]
+
+    def merge(self, other):
+        for page in other.by_uri.values():
+            self.add_page(page)
+        return self
+
+    def page(self, uri):
+        return self.by_uri.get(uri)
+
+    def sections(self, category):
+        """(uriPath, section) pairs for every section of `category`."""
+        return self.sections_by_category.get(category, [])
+
+    def pages_with_sections(self):
+        return [page for page in self.by_uri.values() if page.get('sections')]
+
+
+def snapshot_size(file_path):
+    if file_path.startswith("archive:"):
+        from snapshot_store import resolve
+
+        return resolve(file_path)[1]["size"]
+    return os.path.getsize(file_path)
+
+
+def load_site_model(file_path, uri_paths=None, selective=None):
+    """Index a snapshot's window._site.
+
+    `uri_paths` lists the pages the caller needs. With `selective`, only
+    those are decoded (see site_json.load_pages) and the model holds nothing
+    else; by default that happens only for snapshots of SELECTIVE_MIN_BYTES
+    or more, and smaller ones are decoded whole.
+    """
+    if uri_paths is not None and selective is None:
+        selective = snapshot_size(file_path) >= SELECTIVE_MIN_BYTES
+    if uri_paths is not None and selective:
+        pages = load_pages(file_path, uri_paths)
+        site = None if pages is None else {'pages': list(pages.values())}
+    else:
+        site = load_site(file_path)
+    if site is None:
+        return None
+    return SiteModel(site)
+
+
+def load_site_models(file_paths):
+    """Decode each snapshot once and merge them into one model."""
+    model = None
+    for file_path in file_paths:
+        loaded = load_site_model(file_path)
+        if loaded is None:
+            continue
+        model = loaded if model is None else model.merge(loaded)
+    return model
@@ -0,0 +1,236 @@
+"""Builder sections -> records, driven by a declarative field spec.
+
+A spec maps record attributes to where their value lives in a section's
+binding:
+
+- "link.href | href": the first path that holds a value.
+- Text("title | heading"): the same, cleaned of builder markup.
+- Every("image.value", "images[].value"): every value the paths hold.
+- Records(Link, BUTTON_SPEC, "buttons[]"): one record per dict the paths
+  hold, built with the nested spec.
+
+A path is a chain of dict keys joined by "."; "[]" after a key walks every
+entry of that list. Each spec is compiled once into a builder function
+(see compile_spec), so a section is built in one pass without re-reading
+the spec. Adding a field is a spec change: SECTION_SPEC for every section,
+CATEGORY_SPECS for one category.
+"""
+from functools import lru_cache, partial
+from operator import methodcaller
+
+import boilerplate
+import records
+import rich_text
+from boilerplate import is_boilerplate
+from instrument import stage
+from records import Link, Page, Section
+from rich_text import plain_text
+
+# This module and the ones it builds on, for extractor_version().
+SOURCES = (__file__, records.__file__, rich_text.__file__, boilerplate.__file__)
+
+
+# A field value is text or a number: never None, '', a flag or a container.
+NOT_VALUES = (bool, dict, list)
+
+
+def is_value(value):
+    return value is not None and value != '' and value.__class__ not in NOT_VALUES
+
+
+def compile_path(path):
+    """Function returning the list of values found at `path` in a dict."""
+    steps = tuple((key[:-2], True) if key.endswith('[]') else (key, False) for key in path.split('.'))
+
+    def get(obj):
+        values = (obj,)
+        for key, fan in steps:
+            found = []
+            for value in values:
+                if value.__class__ is not dict:
+                    continue
+                value = value.get(key)
+                if fan:
+                    if value.__class__ is list:
+                        found.extend(value)
+                elif value is not None:
+                    found.append(value)
+            values = found
+        return values
+    return get
+
+
+def compile_lookup(path):
+    """Function returning the first value at `path` in a dict, or None.
+
+    Plain key chains are looked up directly; paths that walk a list go
+    through compile_path.
+    """
+    if '[]' in path:
+        values = compile_path(path)
+        return lambda obj: next((value for value in values(obj) if is_value(value)), None)
+    keys = tuple(path.split('.'))
+    if len(keys) == 1:
+        return methodcaller('get', keys[0])
+
+    def get(obj):
+        for key in keys:
+            if obj.__class__ is not dict:
+                return None
+            obj = obj.get(key)
+        return obj
+    return get
+
+
+class First:
+    """The first value found at any of `paths` ("a | b" is split too)."""
+
+    convert = None
+
+    def __init__(self, *paths):
+        self.paths = tuple(path.strip() for alternatives in paths for path in alternatives.split('|'))
+
+    def compile(self):
+        lookups = tuple(compile_lookup(path) for path in self.paths)
+        convert = self.convert
+
+        def get(obj):
+            for lookup in lookups:
+                value = lookup(obj)
+                if is_value(value):
+                    return (convert(value) or None) if convert else value
+            return None
+        return get
+
+
+def clean_text(value, field=None):
+    text = plain_text(str(value))
+    return None if is_boilerplate(text, field) else text
+
+
+class Text(First):
+    """Like First, for builder rich text: the value is reduced to plain
+    text (see rich_text). Builder placeholder text (see boilerplate) is
+    dropped, including the placeholders of `field`."""
+
+    def __init__(self, *paths, field=None):
+        super().__init__(*paths)
+        self.convert = partial(clean_text, field=field) if field else clean_text
+
+
+class Every(First):
+    """Every value found at `paths`, as a list (None when there are none)."""
+
+    def compile(self):
+        paths = tuple(compile_path(path) for path in self.paths)
+
+        def get(obj):
+            return [value for values in paths for value in values(obj) if is_value(value)] or None
+        return get
+
+
+class Records:
+    """A `record` built with `spec` from each dict found at `paths`. With
+    `tag`, the record's `tag` attribute names the key it came from; with
+    `keep`, only records it accepts are kept."""
+
+    def __init__(self, record, spec, *paths, tag=None, keep=None):
+        self.record = record
+        self.spec = spec
+        self.paths = paths
+        self.tag = tag
+        self.keep = keep
+
+    def compile(self):
+        build = compile_spec(self.record, self.spec)
+        sources = tuple((compile_path(path), {self.tag: path.split('.')[0].removesuffix('[]')} if self.tag else {})
+                        for path in self.paths)
+        keep = self.keep
+
+        def get(obj):
+            built = [build(value, **fixed) for values, fixed in sources for value in values(obj)
+                     if value.__class__ is dict]
+            if keep:
+                built = [record for record in built if keep(record)]
+            return built or None
+        return get
+
+
+def compile_spec(record, spec):
+    """Function building a `record` from a dict according to `spec`.
+
+    Every field is compiled once into a getter (paths split, alternatives
+    and conversions resolved), so building a record costs a handful of
+    dict lookups per field. Keyword arguments are passed through to the
+    record as they are.
+    """
+    fields = tuple((attr, (First(field) if isinstance(field, str) else field).compile())
+                   for attr, field in spec.items())
+
+    def build(obj, **fixed):
+        return record(**{attr: get(obj) for attr, get in fields}, **fixed)
+    return build
+
+
+BUTTON_SPEC = {
+    'href': 'link.href | href',
+    'text': Text('title | label', field='button'),
+}
+
+
+def has_label(button):
+    """Buttons whose label was a placeholder are the template's, and dropped."""
+    return button.text is not None
+
+
+ITEM_SPEC = {
+    'title': Text('title | heading', field='title'),
+    'subtitle': Text('subtitle | subHeading', field='subtitle'),
+    'description': Text('description | text'),
+    'price': Text('price'),
+    'images': Every('image.value', 'images[].value'),
+    'link': 'link.href',
+}
+
+
+def has_content(item):
+    """Items left without any text (all placeholders) or image are dropped."""
+    return bool(item.title or item.subtitle or item.description or item.price or item.link or item.images)
+
+
+SECTION_SPEC = {
+    'title': Text('title | heading', field='title'),
+    'subtitle': Text('subtitle | subHeading', field='subtitle'),
+    'description': Text('description | text'),
+    'images': Every('image.value', 'images[].value'),
+    'buttons': Records(Link, BUTTON_SPEC, 'buttons[]', keep=has_label),
+    'items': Records(Section, ITEM_SPEC, 'list[]', 'cards[]', tag='category', keep=has_content),
+}
+
+# Merged over SECTION_SPEC for sections of that category.
+CATEGORY_SPECS = {
+    'videos': {
+        'images': Every('video.videoThumbnailUrl'),
+        'link': 'video.videoUrl',
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def section_builder(category):
+    return compile_spec(Section, SECTION_SPEC | CATEGORY_SPECS.get(category, {}))
+
+
+def section_record(section):
+    category = section.get('category')
+    return section_builder(category)(section.get('binding') or {}, id=section.get('id'), category=category)
+
+
+def page_record(page_data):
+    """Page record for a builder page from window._site."""
+    with stage('section_walk'):
+        return Page(
+            uri=page_data.get('uriPath'),
+            title=page_data.get('title'),
+            sections=[section_record(section) for section in page_data.get('sections', [])],
+        )
@@ -0,0 +1,266 @@
+"""Compressed history of every fetched snapshot.
+
+Each version is compressed on its own (zstd when the zstandard package is
+installed, lzma otherwise) and appended to one pack file; index.jsonl
+records, per version, its URL, snapshot name, fetch time, sha256 and the
+offset of its frame. Reading any version seeks to that frame and inflates
+only it.
+
+A body identical to the previous version under the same URL and name is
+not recorded again, and versions with the same content (of different
+URLs, or the same URL archived under another name) share a frame.
+
+Extractors accept "archive:<url or name>[@<time>]" wherever they take a
+snapshot path, e.g. archive:temp_escola.html@2026-10-18T07:00 for the
+version current at that time (the latest when no time is given).
+"""
+import datetime
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+STORE_DIR = ".snapshot_store"
+ARCHIVE_PREFIX = "archive:"
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def default_codec():
+    return "zstd" if _zstandard() else "lzma"
+
+
+# The codec modules are imported on use: extractors import this module for
+# open_binary() and mostly read plain files.
+def compress(data, codec):
+    if codec == "zstd":
+        return _zstandard().ZstdCompressor(level=19).compress(data)
+    if codec == "lzma":
+        import lzma
+
+        return lzma.compress(data, preset=6)
+    if codec == "gzip":
+        import gzip
+
+        return gzip.compress(data, 9)
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+def decompressing_reader(frame, codec):
+    """Binary stream inflating `frame` as it is read."""
+    raw = io.BytesIO(frame)
+    if codec == "zstd":
+        return _zstandard().ZstdDecompressor().stream_reader(raw)
+    if codec == "lzma":
+        import lzma
+
+        return lzma.LZMAFile(raw)
+    if codec == "gzip":
+        import gzip
+
+        return gzip.GzipFile(fileobj=raw)
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+def parse_time(value):
+    """Epoch seconds from a number or an ISO 8601 date/time (local time)."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+class SnapshotStore:
+    def __init__(self, root=STORE_DIR, codec=None):
+        self.root = root
+        self.codec = codec or default_codec()
+        self.pack_path = os.path.join(root, "versions.pack")
+        self.index_path = os.path.join(root, "index.jsonl")
+        self._lock = threading.Lock()
+        self.entries = []
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+        except OSError:
+            pass
+        self._by_key = {}
+        self._by_sha = {}
+        # (url, name) -> its latest entry.
+        self._latest = {}
+        for entry in self.entries:
+            self._index(entry)
+
+    def _index(self, entry):
+        for key in {entry["url"], entry["name"]} - {None}:
+            self._by_key.setdefault(key, []).append(entry)
+        self._by_sha.setdefault(entry["sha256"], entry)
+        self._latest[entry["url"], entry["name"]] = entry
+
+    def put(self, body, url=None, name=None, fetched_at=None):
+        """Archive a version of a snapshot. Returns its index entry, or
+        the previous one of the same url and name when the body has not
+        changed."""
+        if url is None and name is None:
+            raise ValueError("A snapshot needs a url or a name")
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            latest = self._latest.get((url, name))
+            if latest and latest["sha256"] == digest:
+                return latest
+
+            entry = {"url": url, "name": name, "fetched_at": fetched_at or time.time(),
+                     "sha256": digest, "size": len(body)}
+            shared = self._by_sha.get(digest)
+            if shared is not None:
+                entry.update(codec=shared["codec"], offset=shared["offset"], length=shared["length"])
+            else:
+                frame = compress(body, self.codec)
+                os.makedirs(self.root, exist_ok=True)
+                with open(self.pack_path, "ab") as pack:
+                    offset = pack.tell()
+                    pack.write(frame)
+                entry.update(codec=self.codec, offset=offset, length=len(frame))
+            # The frame is on disk before the index points at it.
+            with open(self.index_path, "a", encoding="utf-8") as index:
+                index.write(json.dumps(entry) + "\n")
+            self.entries.append(entry)
+            self._index(entry)
+            return entry
+
+    def versions(self, key):
+        """Every version archived under a URL or snapshot name, oldest first."""
+        return sorted(self._by_key.get(key, []), key=lambda entry: entry["fetched_at"])
+
+    def find(self, key, at=None):
+        """The version of `key` current at time `at` (default: the latest)."""
+        at = parse_time(at)
+        found = None
+        for entry in self.versions(key):
+            if at is not None and entry["fetched_at"] > at:
+                break
+            found = entry
+        if found is None:
+            raise KeyError(f"No archived version of {key!r}" + (f" at {at}" if at is not None else ""))
+        return found
+
+    def _frame(self, entry):
+        with open(self.pack_path, "rb") as pack:
+            pack.seek(entry["offset"])
+            return pack.read(entry["length"])
+
+    def open(self, entry):
+        """Binary stream of a version's body."""
+        return decompressing_reader(self._frame(entry), entry["codec"])
+
+    def read(self, entry):
+        with self.open(entry) as stream:
+            return stream.read()
+
+    def stats(self):
+        frames = {(entry["offset"], entry["length"]) for entry in self.entries}
+        return {
+            "versions": len(self.entries),
+            "keys": len({entry["url"] or entry["name"] for entry in self.entries}),
+            "raw_bytes": sum(entry["size"] for entry in self.entries),
+            "stored_bytes": sum(length for _, length in frames),
+        }
+
+
+def is_archive_ref(path):
+    return isinstance(path, str) and path.startswith(ARCHIVE_PREFIX)
+
+
+def resolve(ref, store=None):
+    """(store, entry) for an "archive:<key>[@<time>]" reference."""
+    key = ref[len(ARCHIVE_PREFIX):]
+    store = store or SnapshotStore()
+    at = None
+    if key not in store._by_key and "@" in key:
+        key, at = key.rsplit("@", 1)
+    return store, store.find(key, at)
+
+
+def open_binary(path):
+    """Binary stream of a snapshot file or an archived version."""
+    if is_archive_ref(path):
+        store, entry = resolve(path)
+        return store.open(entry)
+    return open(path, "rb")
+
+
+def read_bytes(path):
+    with open_binary(path) as f:
+        return f.read()
+
+
+def ref_digest(path):
+    """sha256 of the version an archive reference points at, or None."""
+    try:
+        return resolve(path)[1]["sha256"]
+    except KeyError:
+        return None
+
+
+def _format_time(epoch):
+    return datetime.datetime.fromtimestamp(epoch).isoformat(timespec="seconds")
+
+
+def main(argv=None):
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Browse and fill the compressed snapshot archive.")
+    parser.add_argument("--root", default=STORE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="archive snapshot files (timestamped with their mtime)")
+    add.add_argument("files", nargs="+")
+    ls = sub.add_parser("list", help="list archived versions")
+    ls.add_argument("key", nargs="?")
+    show = sub.add_parser("show", help="write an archived version to stdout")
+    show.add_argument("key")
+    show.add_argument("--at", help="time (ISO 8601 or epoch); default: latest")
+    sub.add_parser("stats")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.root)
+    if args.command == "add":
+        for path in sorted({p for pattern in args.files for p in glob.glob(pattern)}):
+            with open(path, "rb") as f:
+                entry = store.put(f.read(), name=os.path.basename(path), fetched_at=os.path.getmtime(path))
+            print(f"{path}: {entry['sha256'][:12]} {entry['size']} -> {entry['length']} bytes")
+    elif args.command == "list":
+        keys = [args.key] if args.key else sorted({e["url"] or e["name"] for e in store.entries})
+        for key in keys:
+            for entry in store.versions(key):
+                print(f"{_format_time(entry['fetched_at'])}  {entry['sha256'][:12]}  {entry['size']:>9}  "
+                      f"{entry['name'] or ''}  {entry['url'] or ''}")
+    elif args.command == "show":
+        try:
+            entry = store.find(args.key, args.at)
+        except KeyError as e:
+            print(e.args[0], file=sys.stderr)
+            return 1
+        with store.open(entry) as stream:
+            for chunk in iter(lambda: stream.read(1 << 16), b""):
+                sys.stdout.buffer.write(chunk)
+    else:
+        stats = store.stats()
+        ratio = stats["raw_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0
+        print(f"{stats['versions']} versions of {stats['keys']} snapshots: {stats['raw_bytes']} bytes "
+              f"stored in {stats['stored_bytes']} ({ratio:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,263 @@
+"""Re-extract snapshots as they change, keeping what was parsed in memory.
+
+The watcher polls a directory for temp_*.html. A file whose mtime or size
+moved is hashed, and only a new hash counts as a change, so a touch or a
+re-fetch of identical bytes does nothing. For each changed snapshot it
+re-runs just the extractors that read it:
+
+- site: the builder pages whose sections come from this snapshot
+  (the same outputs and precedence as extract_site);
+- curso_adv: temp_cursoadv.html -> curso_adv_data.json;
+- downloads: temp_downloads.html -> downloads_data.json.
+
+The watcher remembers, for every page, which snapshot its sections come
+from (the first one by path, as in extract_site), so an edit decodes only
+the edited snapshot; another one is decoded only when it takes over a page
+the edited one stopped carrying. Decoded window._site models and
+BeautifulSoup trees stay in two bounded LRUs keyed by content hash.
+Outputs are only rewritten when their text changes.
+"""
+import argparse
+import fnmatch
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from extract_site import render_page
+from site_json import load_site_bytes
+from site_model import SiteModel
+
+POLL_SECONDS = 0.25
+# Decoded window._site models kept in memory.
+CACHE_SIZE = 16
+# Soup trees are far bigger, and only temp_cursoadv.html needs one.
+SOUP_CACHE_SIZE = 2
+PATTERN = "temp_*.html"
+
+
+class LRUCache:
+    """At most `maxsize` entries; the least recently used one goes first."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key, load):
+        """The value for `key`, computed with load() when not cached."""
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            value = self._entries[key] = load()
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return value
+        self.hits += 1
+        return self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Snapshot:
+    __slots__ = ("path", "mtime_ns", "size", "digest")
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime_ns = self.size = self.digest = None
+
+
+def write_if_changed(path, text):
+    """Write `text` unless the file already holds it; True if written."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return True
+
+
+class Watcher:
+    def __init__(self, directory=".", out_dir=".", pattern=PATTERN, cache_size=CACHE_SIZE, backend=None,
+                 soup_cache_size=SOUP_CACHE_SIZE):
+        self.directory = directory
+        self.out_dir = out_dir
+        self.pattern = pattern
+        self.backend = backend
+        self.models = LRUCache(cache_size)
+        self.soups = LRUCache(soup_cache_size)
+        self.snapshots = {}
+        # path -> uriPaths of the pages that snapshot has sections for.
+        self.section_uris = {}
+
+    def _read(self, snapshot):
+        with open(snapshot.path, "rb") as f:
+            return f.read()
+
+    def scan(self):
+        """(snapshots whose content changed, paths that disappeared) since the
+        last scan, both by path."""
+        changed = []
+        seen = set()
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or not fnmatch.fnmatch(entry.name, self.pattern):
+                continue
+            seen.add(entry.path)
+            snapshot = self.snapshots.get(entry.path)
+            if snapshot is None:
+                snapshot = self.snapshots[entry.path] = Snapshot(entry.path)
+            st = entry.stat()
+            if (st.st_mtime_ns, st.st_size) == (snapshot.mtime_ns, snapshot.size):
+                continue
+            snapshot.mtime_ns, snapshot.size = st.st_mtime_ns, st.st_size
+            try:
+                digest = hashlib.sha256(self._read(snapshot)).hexdigest()
+            except OSError:
+                # Being replaced right now; the next scan sees the new file.
+                snapshot.mtime_ns = None
+                continue
+            if digest != snapshot.digest:
+                snapshot.digest = digest
+                changed.append(snapshot)
+        removed = sorted(set(self.snapshots) - seen)
+        for path in removed:
+            del self.snapshots[path]
+        return sorted(changed, key=lambda snapshot: snapshot.path), removed
+
+    def model(self, snapshot):
+        """SiteModel of a snapshot, or None when it has no window._site."""
+        def load():
+            site = load_site_bytes(self._read(snapshot))
+            return None if site is None else SiteModel(site)
+        return self.models.get(snapshot.digest, load)
+
+    def soup(self, snapshot):
+        from extract_curso_adv import parse_snapshot
+
+        return self.soups.get((snapshot.digest, self.backend),
+                              lambda: parse_snapshot(self._read(snapshot), self.backend))
+
+    def owner(self, uri):
+        """Path of the snapshot page `uri`'s sections come from: the first
+        one, by path, that has them."""
+        return min((path for path, uris in self.section_uris.items() if uri in uris), default=None)
+
+    def reassign(self, path, uris, model=None):
+        """Record that snapshot `path` (whose model is `model`) now has
+        sections for `uris`, and render the pages whose output that changes:
+        the ones it provides, and the ones it gave up to another snapshot."""
+        old = self.section_uris.get(path, set())
+        affected = sorted(old | uris)
+        old_owners = {uri: self.owner(uri) for uri in affected}
+        if uris:
+            self.section_uris[path] = uris
+        else:
+            self.section_uris.pop(path, None)
+
+        written = []
+        for uri in affected:
+            owner = self.owner(uri)
+            if owner == path:
+                page = model.page(uri)
+            elif owner is not None and old_owners[uri] == path:
+                page = self.model(self.snapshots[owner]).page(uri)
+            else:
+                continue
+            file_name, text = render_page(page)
+            out_path = os.path.join(self.out_dir, file_name)
+            if write_if_changed(out_path, text):
+                written.append(out_path)
+        return written
+
+    def run_site(self, snapshot):
+        """Render the pages whose output depends on this snapshot."""
+        model = self.model(snapshot)
+        uris = set() if model is None else {page.get("uriPath") for page in model.pages_with_sections()}
+        return self.reassign(snapshot.path, uris, model)
+
+    def run_curso_adv(self, snapshot):
+        from extract_curso_adv import OUTPUT_FILE, build_page, render_json
+
+        soup, encoding = self.soup(snapshot)
+        if not soup.body:
+            return []
+        out_path = os.path.join(self.out_dir, OUTPUT_FILE)
+        return [out_path] if write_if_changed(out_path, render_json(build_page(soup, encoding))) else []
+
+    def run_downloads(self, snapshot):
+        from extract_downloads import OUTPUT_FILE, render_downloads
+
+        # Streaming parse, nothing worth caching.
+        _, text = render_downloads(snapshot.path)
+        out_path = os.path.join(self.out_dir, OUTPUT_FILE)
+        return [out_path] if write_if_changed(out_path, text) else []
+
+    def extractors(self, snapshot):
+        """The extractors reading `snapshot`, as (name, function)."""
+        found = [("site", self.run_site)]
+        name = os.path.basename(snapshot.path)
+        if name == "temp_cursoadv.html":
+            found.append(("curso_adv", self.run_curso_adv))
+        elif name == "temp_downloads.html":
+            found.append(("downloads", self.run_downloads))
+        return found
+
+    def run_once(self):
+        """Scan, and re-run what the changes affect. Returns the number of
+        changed or removed snapshots."""
+        changed, removed = self.scan()
+        for path in removed:
+            written = self.reassign(path, set())
+            print(f"{path}: removed; {', '.join(written) or 'no output changed'}")
+        for snapshot in changed:
+            started = time.perf_counter()
+            written, errors = [], []
+            for name, run in self.extractors(snapshot):
+                try:
+                    written.extend(run(snapshot))
+                except Exception as e:
+                    errors.append(f"{name}: {type(e).__name__}: {e}")
+            ms = (time.perf_counter() - started) * 1000
+            outputs = ", ".join(written) or "no output changed"
+            print(f"{snapshot.path}: {outputs} ({ms:.0f} ms)")
+            for error in errors:
+                print(f"  FAILED {error}")
+        return len(changed) + len(removed)
+
+    def run(self, interval=POLL_SECONDS):
+        while True:
+            self.run_once()
+            time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch the snapshots and re-extract the ones that change.")
+    parser.add_argument("directory", nargs="?", default=".")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--pattern", default=PATTERN)
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="seconds between scans")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="decoded window._site models kept in memory")
+    parser.add_argument("--soup-cache-size", type=int, default=SOUP_CACHE_SIZE, help="soup trees kept in memory")
+    parser.add_argument("--backend", help="HTML parser for soup-based extractors")
+    args = parser.parse_args(argv)
+
+    watcher = Watcher(args.directory, args.out_dir, args.pattern, args.cache_size, args.backend,
+                      args.soup_cache_size)
+    print(f"Watching {args.pattern} in {args.directory} (Ctrl-C to stop)")
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+    print(f"Models: {watcher.models.hits} hits, {watcher.models.misses} misses; "
+          f"soups: {watcher.soups.hits} hits, {watcher.soups.misses} misses")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())